@@ -2,16 +2,19 @@ from airflow import DAG
 from airflow.operators.python_operator import PythonOperator
 from datetime import datetime, timedelta
 import subprocess
+import sys
 import os 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
 # Path ke model
 file_path = os.path.join(current_dir, "../src/main.py")
-file1_path = os.path.join(current_dir, "../src/scrap_twitter.py")
-file2_path = os.path.join(current_dir, "../src/scrap_thread.py")
-file3_path = os.path.join(current_dir, "../src/transform.py")
-file4_path = os.path.join(current_dir, "../src/load.py")
+
+# Stage dijalankan di dalam proses task; import stage dilakukan di dalam
+# callable agar parsing DAG oleh scheduler tidak ikut memuat torch/selenium
+src_dir = os.path.join(current_dir, "../src")
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
 
 
 default_args = {
@@ -28,26 +31,33 @@ def run_main_py():
     """Function to execute main.py script."""
     subprocess.run(["python", file_path], check=True)
 
-def run_scrap_py():
-    """Function to execute scrap_twitter.py script."""
-    subprocess.run(["python", file1_path], check=True)
+def run_scrap_py(ds, **context):
+    """Scrape Twitter and return the 'scraped' artifact reference (pushed to XCom)."""
+    from scrap_twitter import scrape_twitter_stage
+    return scrape_twitter_stage(run_date=ds)
 
-def run_scrap_thread_py():
-    """Function to execute scrap_thread.py script."""
-    subprocess.run(["python", file2_path], check=True)
+def run_scrap_thread_py(ds, **context):
+    """Scrape Threads and return the 'scraped' artifact reference (pushed to XCom)."""
+    from scrap_thread import scrape_threads_stage
+    return scrape_threads_stage(run_date=ds)
 
-def run_transform_py():
-    """Function to execute transform.py script."""
-    subprocess.run(["python", file3_path], check=True)
+def run_transform_py(ds, ti, **context):
+    """Transform the artifacts referenced by both scrape tasks and return the 'cleaned' reference."""
+    from transform import transform_stage
+    scraped = ti.xcom_pull(task_ids=['run_scrap_twitter', 'run_scrap_thread'])
+    run_date = next((reference['run_date'] for reference in scraped if reference), ds)
+    return transform_stage(run_date=run_date)
 
-def run_load_py():
-    """Function to execute load.py script."""
-    subprocess.run(["python", file4_path], check=True)
+def run_load_py(ds, ti, **context):
+    """Load the 'cleaned' artifact referenced by the transform task and return the insert summary."""
+    from load import load_stage
+    cleaned = ti.xcom_pull(task_ids='run_transform_py')
+    return load_stage(run_date=cleaned['run_date'] if cleaned else ds)
 
 with DAG(
     'daily_main_py_dag',
     default_args=default_args,
-    description='DAG to run scrap_twitter.py and scrap_thread.py in parallel, followed by main.py',
+    description='DAG to run the Twitter and Threads scrape stages in parallel, followed by transform and load',
     schedule_interval='0 8 * * *',  # Cron expression for daily at 8 AM
     catchup=False
 ) as dag:
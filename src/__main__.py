@@ -0,0 +1,147 @@
+"""
+CLI tunggal untuk stage pipeline. Setiap subcommand hanya mengimpor modul yang
+dipakainya, sehingga `load` tidak ikut memuat torch atau selenium.
+
+Usage (dari root repository):
+    python -m src scrape [--platform twitter|threads|all] [--run-date YYYY-MM-DD]
+    python -m src transform [--run-date YYYY-MM-DD] [--chunk-size N]
+    python -m src load [--run-date YYYY-MM-DD]
+    python -m src check-imports [--max-seconds S]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import subprocess
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# Modul berat yang tidak boleh ikut terimpor oleh modul stage tertentu
+IMPORT_BUDGETS = {
+    'scrap_twitter': ['torch', 'transformers', 'playwright', 'psycopg2'],
+    'scrap_thread': ['torch', 'transformers', 'selenium', 'bs4', 'psycopg2'],
+    'transform': ['selenium', 'bs4', 'playwright', 'psycopg2', 'torch', 'transformers'],
+    'load': ['torch', 'transformers', 'selenium', 'bs4', 'playwright'],
+}
+
+# Dijalankan di interpreter baru agar sys.modules bersih
+_PROBE = """
+import sys, json, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': sorted({{name.split('.')[0] for name in sys.modules}})}}))
+"""
+
+
+def run_scrape(args):
+    """Menjalankan stage scraping untuk platform yang dipilih."""
+    results = []
+    if args.platform in ('twitter', 'all'):
+        from scrap_twitter import scrape_twitter_stage
+        results.append(scrape_twitter_stage(run_date=args.run_date))
+    if args.platform in ('threads', 'all'):
+        from scrap_thread import scrape_threads_stage
+        results.append(scrape_threads_stage(run_date=args.run_date))
+    return results
+
+
+def run_transform(args):
+    """Menjalankan stage transform."""
+    from transform import transform_stage
+    return transform_stage(run_date=args.run_date, chunk_size=args.chunk_size)
+
+
+def run_load(args):
+    """Menjalankan stage load."""
+    from load import load_stage
+    from db.db_operations import close_pool
+    try:
+        return load_stage(run_date=args.run_date)
+    finally:
+        close_pool()
+
+
+def check_imports(max_seconds=None):
+    """
+    Mengimpor setiap modul stage di interpreter baru dan memeriksa bahwa tidak
+    ada modul berat di luar budget-nya yang ikut terimpor.
+
+    Parameters:
+    - max_seconds (float, optional): Batas waktu impor per modul.
+
+    Returns:
+    - list[str]: Daftar pelanggaran; kosong jika semua modul lolos.
+    """
+    failures = []
+    for module, forbidden in IMPORT_BUDGETS.items():
+        probe = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(src=SRC_DIR, module=module)],
+            capture_output=True, text=True, cwd=SRC_DIR
+        )
+        if probe.returncode != 0:
+            failures.append(f"{module}: import failed: {probe.stderr.strip().splitlines()[-1]}")
+            continue
+        result = json.loads(probe.stdout.strip().splitlines()[-1])
+        leaked = sorted(set(forbidden) & set(result['modules']))
+        status = "ok"
+        if leaked:
+            failures.append(f"{module}: imports {', '.join(leaked)}")
+            status = "LEAK"
+        if max_seconds is not None and result['seconds'] > max_seconds:
+            failures.append(f"{module}: import took {result['seconds']:.2f}s (budget {max_seconds}s)")
+            status = "SLOW"
+        print(f"{module:<15} {result['seconds']:6.2f}s  {status}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src', description="Jalankan stage pipeline sentimen.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    scrape = subcommands.add_parser('scrape', help="Scraping Twitter dan/atau Threads.")
+    scrape.add_argument('--platform', choices=['twitter', 'threads', 'all'], default='all')
+    scrape.add_argument('--run-date', default=None, help="Tanggal run (YYYY-MM-DD).")
+
+    transform = subcommands.add_parser('transform', help="Gabung, labeli, dan bersihkan data hasil scraping.")
+    transform.add_argument('--run-date', default=None, help="Tanggal run (YYYY-MM-DD).")
+    transform.add_argument('--chunk-size', type=int, default=None, help="Ukuran chunk mode streaming.")
+
+    load = subcommands.add_parser('load', help="Masukkan data bersih ke PostgreSQL.")
+    load.add_argument('--run-date', default=None, help="Tanggal run (YYYY-MM-DD).")
+
+    check = subcommands.add_parser('check-imports', help="Periksa budget impor setiap stage.")
+    check.add_argument('--max-seconds', type=float, default=None, help="Batas waktu impor per modul.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'check-imports':
+        failures = check_imports(args.max_seconds)
+        for failure in failures:
+            print(f"FAIL {failure}")
+        return 1 if failures else 0
+
+    logging.basicConfig(
+        filename='data_pipeline.log',
+        filemode='a',
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    stages = {'scrape': run_scrape, 'transform': run_transform, 'load': run_load}
+    try:
+        result = stages[args.command](args)
+    except Exception as e:
+        logging.error(f"Error during {args.command}: {e}")
+        print(f"Error during {args.command}: {e}")
+        return 1
+    print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
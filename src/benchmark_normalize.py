@@ -0,0 +1,258 @@
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from utils.normalize import parse_engagement_counts, convert_column_to_integer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Format yang sudah didukung parser lama: (suffix, pengali)
+LEGACY_SUFFIXES = [('', 1), ('K', 1000), ('M', 1000000)]
+# Format lokal Indonesia dan variasi lain yang membuat parser lama mengembalikan 0
+LOCALE_SUFFIXES = [(' rb', 1000), ('rb', 1000), (' ribu', 1000), (' jt', 1000000), ('jt', 1000000), ('k', 1000)]
+GARBAGE = ['', 'abc', 'K', '-', '1..2K', '12X', '—', '1 2', '-5']
+
+
+def legacy_convert_to_int(value):
+    """
+    Parser per-sel sebelum vectorisasi, disimpan sebagai referensi validasi.
+    Nilai seperti 'K' atau '1..2K' membuatnya raise ValueError, sehingga
+    `convert_column_to_integer` lama membiarkan seluruh kolom tidak terkonversi.
+    """
+    if pd.isna(value):
+        return 0
+    if isinstance(value, str):
+        if value.endswith('K'):
+            return int(float(value[:-1]) * 1000)
+        elif value.endswith('M'):
+            return int(float(value[:-1]) * 1000000)
+        elif value.replace('.', '', 1).isdigit():
+            return int(float(value))
+    elif isinstance(value, (int, float)):
+        return int(value)
+    return 0
+
+
+def _decimal_text(rng, max_int=999):
+    whole = rng.randint(0, max_int)
+    if rng.random() < 0.5:
+        return str(whole), Decimal(whole)
+    fraction = str(rng.randint(0, 99)).rjust(rng.choice([1, 2]), '0')
+    return f"{whole}.{fraction}", Decimal(f"{whole}.{fraction}")
+
+
+def generate_corpus(rows, seed=0):
+    """
+    Membangkitkan korpus angka engagement acak beserta nilai yang benar.
+
+    Parameters:
+    - rows (int): Jumlah nilai.
+    - seed (int): Seed generator.
+
+    Returns:
+    - tuple: (list nilai mentah, list nilai benar atau None, list jenis format).
+    """
+    rng = random.Random(seed)
+    values, expected, kinds = [], [], []
+    for _ in range(rows):
+        roll = rng.random()
+        if roll < 0.45:
+            suffix, multiplier = rng.choice(LEGACY_SUFFIXES)
+            text, number = _decimal_text(rng, 99999 if multiplier == 1 else 999)
+            values.append(text + suffix)
+            expected.append(int(number * multiplier))
+            kinds.append('legacy')
+        elif roll < 0.65:
+            suffix, multiplier = rng.choice(LOCALE_SUFFIXES)
+            text, number = _decimal_text(rng)
+            values.append(text.replace('.', ',') + suffix)
+            expected.append(int(number * multiplier))
+            kinds.append('locale')
+        elif roll < 0.75:
+            number = rng.randint(1000, 99999999)
+            values.append(f"{number:,}".replace(',', rng.choice(['.', ','])))
+            expected.append(number)
+            kinds.append('grouped')
+        elif roll < 0.85:
+            number = rng.randint(0, 100000)
+            values.append(number if rng.random() < 0.5 else float(number))
+            expected.append(number)
+            kinds.append('numeric')
+        elif roll < 0.93:
+            values.append(rng.choice([None, np.nan]))
+            expected.append(None)
+            kinds.append('missing')
+        else:
+            values.append(rng.choice(GARBAGE))
+            expected.append(None)
+            kinds.append('garbage')
+    return values, expected, kinds
+
+
+def validate(rows=200000, seed=0):
+    """
+    Membandingkan parser vectorized dengan parser lama dan dengan nilai yang benar.
+
+    Format lama harus sama persis dengan parser lama, kecuali jika parser lama
+    salah karena pembulatan float (misalnya '4.35K' -> 4349). Format lokal dan
+    grup ribuan harus sama dengan nilai yang benar. Nilai kosong dan tidak valid
+    harus menjadi 0 di `convert_column_to_integer`, sama seperti sebelumnya.
+
+    Parameters:
+    - rows (int): Ukuran korpus.
+    - seed (int): Seed generator.
+
+    Returns:
+    - dict: Jumlah baris per jenis format, selisih dan kegagalan.
+    """
+    values, expected, kinds = generate_corpus(rows, seed)
+    frame = pd.DataFrame({'Likes': pd.Series(values, dtype=object)})
+    parsed = parse_engagement_counts(frame['Likes'])
+    converted = convert_column_to_integer(frame.copy(), 'Likes')['Likes']
+
+    report = {'rows': rows, 'kinds': {}, 'legacy_float_errors': 0, 'failures': []}
+    for i, (value, truth, kind) in enumerate(zip(values, expected, kinds)):
+        report['kinds'][kind] = report['kinds'].get(kind, 0) + 1
+        try:
+            legacy = legacy_convert_to_int(value)
+        except ValueError:
+            legacy = 'ValueError'
+        new = None if pd.isna(parsed.iloc[i]) else int(parsed.iloc[i])
+        if kind == 'legacy' and legacy != new:
+            if new == truth:
+                report['legacy_float_errors'] += 1
+                continue
+        if new != truth or int(converted.iloc[i]) != (truth or 0):
+            report['failures'].append({'value': repr(value), 'expected': truth, 'parsed': new, 'legacy': legacy})
+    return report
+
+
+def render_count(count, locale='en'):
+    """Menampilkan angka seperti UI: '987', '1.2K', '3M' (en) atau '1,2 rb', '3 jt' (id)."""
+    if count < 1000:
+        return str(count)
+    if count < 1000000:
+        number, suffix = count / 1000, ('K' if locale == 'en' else ' rb')
+    else:
+        number, suffix = count / 1000000, ('M' if locale == 'en' else ' jt')
+    text = f"{number:.1f}".rstrip('0').rstrip('.')
+    return (text if locale == 'en' else text.replace('.', ',')) + suffix
+
+
+def generate_display_counts(rows, seed=0, locale='en'):
+    """
+    Membangkitkan kolom engagement seperti hasil scraping: angka berdistribusi
+    log-normal yang ditampilkan dengan format UI, dengan sebagian nilai kosong.
+
+    Parameters:
+    - rows (int): Jumlah baris.
+    - seed (int): Seed generator.
+    - locale (str): 'en' atau 'id'.
+
+    Returns:
+    - pd.Series: Kolom string dengan nilai kosong.
+    """
+    rng = np.random.default_rng(seed)
+    counts = np.floor(rng.lognormal(2, 2.5, rows)).astype(np.int64)
+    texts = [render_count(count, locale) for count in counts]
+    missing = rng.random(rows) < 0.05
+    return pd.Series([None if skip else text for text, skip in zip(texts, missing)], dtype='str')
+
+
+def generate_distinct_counts(rows, seed=0):
+    """
+    Membangkitkan kolom engagement yang semua nilainya berbeda: angka mentah
+    dan angka ribuan dengan tiga desimal ('12.345K'), tanpa nilai kosong.
+    Kasus terburuk untuk factorize, karena setiap nilai harus di-parse.
+
+    Parameters:
+    - rows (int): Jumlah baris.
+    - seed (int): Seed generator.
+
+    Returns:
+    - pd.Series: Kolom string tanpa duplikat.
+    """
+    rng = np.random.default_rng(seed)
+    counts = rng.permutation(rows * 10)[:rows]
+    texts = [str(count) if count % 2 else f"{count // 1000}.{count % 1000:03d}K" for count in counts]
+    return pd.Series(texts, dtype='str')
+
+
+def benchmark(rows=1000000, seed=0, repeat=3, distinct=False):
+    """
+    Mengukur waktu parser lama (`Series.apply`) dan parser vectorized pada
+    kolom berformat UI ('en', yang juga didukung parser lama).
+
+    Parameters:
+    - rows (int): Jumlah baris.
+    - seed (int): Seed generator.
+    - repeat (int): Jumlah pengulangan; waktu terbaik yang dilaporkan.
+    - distinct (bool): Pakai kolom yang semua nilainya berbeda (`generate_distinct_counts`).
+
+    Returns:
+    - dict: Waktu dalam detik dan speedup.
+    """
+    column = generate_distinct_counts(rows, seed) if distinct else generate_display_counts(rows, seed)
+
+    def best_of(fn):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    legacy_seconds = best_of(lambda: column.apply(legacy_convert_to_int))
+    vectorized_seconds = best_of(lambda: parse_engagement_counts(column))
+    return {
+        'rows': rows,
+        'distinct_values': int(column.nunique()),
+        'legacy_seconds': round(legacy_seconds, 4),
+        'vectorized_seconds': round(vectorized_seconds, 4),
+        'speedup': round(legacy_seconds / vectorized_seconds, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validasi dan benchmark parser angka engagement utils.normalize.")
+    parser.add_argument('--validate-rows', type=int, default=200000)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--min-speedup', type=float, default=10.0)
+    parser.add_argument('--min-distinct-speedup', type=float, default=1.25)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    validation = validate(args.validate_rows, args.seed)
+    timing = benchmark(args.rows, args.seed)
+    distinct_timing = benchmark(args.rows, args.seed, distinct=True)
+    report = {
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__},
+        'validation': {**validation, 'failures': validation['failures'][:20], 'failure_count': len(validation['failures'])},
+        'benchmark': timing,
+        'benchmark_distinct': distinct_timing,
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+    if validation['failures']:
+        logger.error(f"{len(validation['failures'])} values parsed incorrectly.")
+        sys.exit(1)
+    if timing['speedup'] < args.min_speedup:
+        logger.error(f"Speedup {timing['speedup']}x is below {args.min_speedup}x.")
+        sys.exit(1)
+    if distinct_timing['speedup'] < args.min_distinct_speedup:
+        logger.error(f"Speedup on distinct values {distinct_timing['speedup']}x is below {args.min_distinct_speedup}x.")
+        sys.exit(1)
+    logger.info(
+        f"Validation passed; {timing['speedup']}x faster on {timing['rows']} rows, "
+        f"{distinct_timing['speedup']}x faster on {distinct_timing['rows']} distinct values."
+    )
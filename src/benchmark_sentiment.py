@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Suku kata dan kata umum untuk membangkitkan teks mirip bahasa Indonesia
+SYLLABLES = [
+    'ba', 'be', 'bi', 'bu', 'da', 'di', 'du', 'ga', 'gi', 'gu', 'ja', 'ka', 'ke', 'ki', 'ku',
+    'la', 'le', 'li', 'lu', 'ma', 'me', 'mi', 'mu', 'na', 'ne', 'ni', 'nu', 'nya', 'nga',
+    'pa', 'pe', 'pi', 'pu', 'ra', 're', 'ri', 'ru', 'sa', 'se', 'si', 'su', 'ta', 'te', 'ti',
+    'tu', 'wa', 'ya', 'an', 'kan', 'lah', 'kah', 'nya', 'pen', 'per', 'ber', 'ter', 'men', 'mem',
+]
+COMMON_WORDS = [
+    'pendidikan', 'indonesia', 'sekolah', 'guru', 'murid', 'siswa', 'mahasiswa', 'kampus',
+    'kurikulum', 'belajar', 'ujian', 'nilai', 'pemerintah', 'menteri', 'anak', 'orang', 'tua',
+    'yang', 'dan', 'di', 'ke', 'dari', 'untuk', 'dengan', 'ini', 'itu', 'tidak', 'sudah',
+    'akan', 'juga', 'karena', 'bisa', 'ada', 'saya', 'kita', 'mereka', 'banget', 'aja',
+]
+SPECIAL_TOKENS = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]']
+PUNCTUATION = list('.,!?:;()"\'-')
+
+MODEL_SIZES = {
+    'tiny': {'hidden_size': 128, 'num_hidden_layers': 2, 'num_attention_heads': 2, 'intermediate_size': 512},
+    'base': {'hidden_size': 768, 'num_hidden_layers': 12, 'num_attention_heads': 12, 'intermediate_size': 3072},
+}
+
+
+def build_random_model(model_dir, size='tiny', seed=0):
+    """
+    Membuat model BERT klasifikasi 3 kelas dengan bobot acak dan tokenizer
+    WordPiece lokal, tanpa unduhan atau akses jaringan.
+
+    Parameters:
+    - model_dir (str): Direktori tujuan.
+    - size (str): Ukuran arsitektur ('tiny' atau 'base').
+    - seed (int): Seed inisialisasi bobot.
+
+    Returns:
+    - str: `model_dir`.
+    """
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    os.makedirs(model_dir, exist_ok=True)
+    letters = [chr(c) for c in range(ord('a'), ord('z') + 1)]
+    vocab = list(dict.fromkeys(
+        SPECIAL_TOKENS + PUNCTUATION + COMMON_WORDS + SYLLABLES + letters
+        + ['##' + s for s in SYLLABLES] + ['##' + c for c in letters]
+    ))
+    vocab_path = os.path.join(model_dir, 'vocab.txt')
+    with open(vocab_path, 'w') as f:
+        f.write('\n'.join(vocab))
+
+    torch.manual_seed(seed)
+    config = BertConfig(vocab_size=len(vocab), num_labels=3, **MODEL_SIZES[size])
+    BertForSequenceClassification(config).save_pretrained(model_dir)
+    BertTokenizerFast(vocab_path).save_pretrained(model_dir)
+    return model_dir
+
+
+def generate_texts(n_rows, seed=0):
+    """
+    Membangkitkan teks sintetis mirip postingan media sosial berbahasa
+    Indonesia. Jumlah kata mengikuti distribusi log-normal (median ~25 kata,
+    ekor panjang untuk thread) dan dipotong ke 3-150 kata.
+
+    Parameters:
+    - n_rows (int): Jumlah teks.
+    - seed (int): Seed generator.
+
+    Returns:
+    - list[str]: Teks sintetis.
+    """
+    rng = random.Random(seed)
+    lengths = np.clip(np.random.default_rng(seed).lognormal(mean=np.log(25), sigma=0.7, size=n_rows), 3, 150)
+
+    texts = []
+    for length in lengths.astype(int):
+        words = []
+        for _ in range(length):
+            if rng.random() < 0.6:
+                words.append(rng.choice(COMMON_WORDS))
+            else:
+                words.append(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+            if rng.random() < 0.08:
+                words[-1] += rng.choice(PUNCTUATION)
+        texts.append(' '.join(words))
+    return texts
+
+
+class TimedRunner:
+    """Membungkus runner inferensi dan mencatat latensi setiap forward pass."""
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.latencies = []
+
+    def __call__(self, input_ids, attention_mask=None):
+        start = time.perf_counter()
+        outputs = self.runner(input_ids, attention_mask=attention_mask)
+        self.latencies.append(time.perf_counter() - start)
+        return outputs
+
+
+def run_setting(setting):
+    """
+    Menjalankan satu konfigurasi benchmark. Dipanggil di proses baru agar
+    peak RSS tidak tercampur antar konfigurasi.
+
+    Parameters:
+    - setting (dict): model_dir, texts, backend, batch_size, max_tokens, threads.
+
+    Returns:
+    - dict: Hasil pengukuran konfigurasi.
+    """
+    import torch
+    from utils.sentiment_labeller import predict_sentiment
+    from utils.sentiment_backends import load_backend, OnnxBackend, export_onnx_model
+
+    torch.set_num_threads(setting['threads'])
+    if setting['backend'] == 'onnx':
+        tokenizer, _, device = load_backend(setting['model_dir'], 'torch')
+        runner = OnnxBackend(export_onnx_model(setting['model_dir']), num_threads=setting['threads'])
+    else:
+        tokenizer, runner, device = load_backend(setting['model_dir'], setting['backend'])
+
+    texts = setting['texts']
+    options = {'max_tokens': setting['max_tokens'], 'max_batch_size': setting['batch_size'], 'show_progress': False}
+
+    # Warm-up agar alokasi awal tidak ikut terukur
+    predict_sentiment(texts[:setting['batch_size']], tokenizer, runner, device, **options)
+
+    timed = TimedRunner(runner)
+    start = time.perf_counter()
+    predict_sentiment(texts, tokenizer, timed, device, **options)
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(timed.latencies) * 1000
+    return {
+        'backend': setting['backend'],
+        'batch_size': setting['batch_size'],
+        'max_tokens': setting['max_tokens'],
+        'threads': setting['threads'],
+        'rows': len(texts),
+        'batches': len(timed.latencies),
+        'seconds': round(elapsed, 4),
+        'rows_per_sec': round(len(texts) / elapsed, 2),
+        'p50_batch_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p95_batch_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+        # ru_maxrss dalam KiB di Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_benchmark(rows=2000, batch_sizes=(1, 16, 64), threads=(1,), backends=('torch',),
+                  max_tokens=4096, size='tiny', model_dir=None, seed=0):
+    """
+    Menjalankan grid benchmark inferensi sentimen.
+
+    Parameters:
+    - rows (int): Jumlah teks sintetis per konfigurasi.
+    - batch_sizes (Iterable[int]): Ukuran batch maksimum yang diuji.
+    - threads (Iterable[int]): Jumlah thread torch/ORT yang diuji.
+    - backends (Iterable[str]): Backend yang diuji ('torch', 'int8', 'onnx').
+    - max_tokens (int): Anggaran token per batch.
+    - size (str): Ukuran model acak ('tiny' atau 'base').
+    - model_dir (str, optional): Direktori model; default direktori sementara.
+    - seed (int): Seed model dan teks.
+
+    Returns:
+    - dict: Laporan JSON-serializable berisi lingkungan, model dan hasil.
+    """
+    temp_dir = None
+    if model_dir is None:
+        temp_dir = tempfile.mkdtemp(prefix='sentiment-bench-')
+        model_dir = os.path.join(temp_dir, 'model')
+    build_random_model(model_dir, size, seed)
+    texts = generate_texts(rows, seed)
+
+    # Spawn agar setiap konfigurasi berjalan di interpreter bersih
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for backend in backends:
+        for thread_count in threads:
+            for batch_size in batch_sizes:
+                setting = {
+                    'model_dir': model_dir,
+                    'texts': texts,
+                    'backend': backend,
+                    'batch_size': batch_size,
+                    'max_tokens': max_tokens,
+                    'threads': thread_count,
+                }
+                with ctx.Pool(1) as pool:
+                    result = pool.apply(run_setting, (setting,))
+                logger.info(
+                    f"{backend} batch={batch_size} threads={thread_count}: "
+                    f"{result['rows_per_sec']} rows/s, p95 {result['p95_batch_ms']} ms"
+                )
+                results.append(result)
+
+    if temp_dir:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'model': {'size': size, **MODEL_SIZES[size]},
+        'rows': rows,
+        'seed': seed,
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark throughput inferensi sentiment_labeller.")
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--backends', nargs='+', default=['torch'], choices=['torch', 'int8', 'onnx'])
+    parser.add_argument('--max-tokens', type=int, default=4096)
+    parser.add_argument('--size', default='tiny', choices=sorted(MODEL_SIZES))
+    parser.add_argument('--output', default=None, help="Path file JSON; default stdout.")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        rows=args.rows,
+        batch_sizes=args.batch_sizes,
+        threads=sorted(set(args.threads)),
+        backends=args.backends,
+        max_tokens=args.max_tokens,
+        size=args.size,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Benchmark report written to {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
@@ -1,7 +1,19 @@
 import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.extensions import connection as _pg_connection, TRANSACTION_STATUS_IDLE
+from psycopg2.pool import ThreadedConnectionPool
+import pandas as pd
+import hashlib
+import io
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import os
 from dotenv import load_dotenv
 import re
+from db.rollups import apply_rollup_delta
+from db.partitions import ensure_partitions
 
 load_dotenv()  # Load variables from .env
 
@@ -26,87 +38,467 @@ def connect_db():
         raise Exception(f"Error connecting to the database: {e}")
 
 
+# Pool settings; statement timeout 0 disables it (e.g. behind a pooler that rejects startup options)
+POOL_MIN_CONNECTIONS = int(os.getenv('DB_POOL_MIN', '1'))
+POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX', '4'))
+STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '300000'))
+# Connections idle for longer than this are pinged before being handed out
+HEALTH_CHECK_INTERVAL = float(os.getenv('DB_HEALTH_CHECK_INTERVAL', '30'))
+# Server-side PREPARE is off by default: transaction-mode poolers such as pgbouncer
+# hand each transaction a different server connection, so prepared plans go missing
+PREPARE_STATEMENTS = os.getenv('DB_PREPARE_STATEMENTS', '0').lower() in ('1', 'true', 'yes')
+
+# Hot single-row statements, prepared server-side per connection by db_session(prepare=True)
+# when DB_PREPARE_STATEMENTS is enabled
+INSERT_MAIN_SQL = """
+    INSERT INTO main_data (text, user_handle, likes, reposts, date, platform, scraped_at, sentiment, fingerprint)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (fingerprint, date) DO NOTHING
+    RETURNING id, date
+"""
+SELECT_MAIN_ID_SQL = "SELECT id, date FROM main_data WHERE fingerprint = %s"
+# The date bounds let the planner prune main_data to the batch's month partitions
+SELECT_MAIN_IDS_SQL = """
+    SELECT fingerprint, id FROM main_data
+    WHERE fingerprint = ANY(%s) AND (date BETWEEN %s AND %s OR date IS NULL)
+"""
+UPSERT_TWITTER_SQL = """
+    INSERT INTO twitter_data (main_id, views, status_id, date)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (status_id, date) DO NOTHING
+"""
+UPSERT_THREAD_SQL = """
+    INSERT INTO thread_data (main_id, replies, date)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (main_id, date) DO NOTHING
+"""
+PREPARED_STATEMENTS = {
+    'insert_main': (INSERT_MAIN_SQL, ['text', 'text', 'integer', 'integer', 'timestamptz', 'text', 'timestamp', 'text', 'text']),
+    'select_main_id': (SELECT_MAIN_ID_SQL, ['text']),
+    'select_main_ids': (SELECT_MAIN_IDS_SQL, ['text[]', 'timestamptz', 'timestamptz']),
+    'upsert_twitter': (UPSERT_TWITTER_SQL, ['integer', 'integer', 'text', 'timestamptz']),
+    'upsert_thread': (UPSERT_THREAD_SQL, ['integer', 'integer', 'timestamptz']),
+}
+
+
+class PooledConnection(_pg_connection):
+    """psycopg2 connection that remembers its prepared statements and last checkin time."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# Callers beyond DB_POOL_MAX wait for a free connection instead of getting PoolError
+_pool_slots = threading.BoundedSemaphore(POOL_MAX_CONNECTIONS)
+# Pools inherited over fork() stay referenced and are never closed in the child: closing or
+# garbage-collecting their connections would send Terminate on sockets the parent still uses
+_inherited_pools = []
+
+
+def _reset_pool_after_fork():
+    global _pool, _pool_lock, _pool_slots
+    if _pool is not None:
+        _inherited_pools.append(_pool)
+    _pool = None
+    _pool_lock = threading.Lock()
+    _pool_slots = threading.BoundedSemaphore(POOL_MAX_CONNECTIONS)
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def get_pool():
+    """
+    Returns the process-wide ThreadedConnectionPool, creating it on first use.
+    A forked child leaves the inherited pool untouched and opens its own connections on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            options = {}
+            if STATEMENT_TIMEOUT_MS > 0:
+                options['options'] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+            try:
+                _pool = ThreadedConnectionPool(
+                    POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS,
+                    connection_factory=PooledConnection, **db_params, **options
+                )
+            except Exception as e:
+                raise Exception(f"Error creating the database connection pool: {e}")
+            print(f"Database connection pool created ({POOL_MIN_CONNECTIONS}-{POOL_MAX_CONNECTIONS} connections).")
+        return _pool
+
+
+def close_pool():
+    """Closes every connection of this process's pool; pools inherited over fork() are left alone."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            print("Database connection pool closed.")
+        _pool = None
+
+
+def _is_healthy(conn):
+    """Pings connections that are closed or have been idle longer than HEALTH_CHECK_INTERVAL."""
+    if conn.closed:
+        return False
+    if time.monotonic() - conn.last_used < HEALTH_CHECK_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _to_positional(sql):
+    """Rewrites %s placeholders to $1, $2, ... for PREPARE."""
+    parts = sql.split('%s')
+    return ''.join(part + (f"${i}" if i < len(parts) else '') for i, part in enumerate(parts, start=1))
+
+
+def prepare_statements(conn):
+    """
+    Prepares the hot insert/upsert statements on this connection (once per connection).
+    Statements that depend on tables not yet migrated are skipped.
+
+    :param conn: PooledConnection from db_session
+    """
+    with conn.cursor() as cur:
+        for name, (sql, types) in PREPARED_STATEMENTS.items():
+            if name in conn.prepared:
+                continue
+            cur.execute("SAVEPOINT prepare_statement")
+            try:
+                cur.execute(f"PREPARE {name} ({', '.join(types)}) AS {_to_positional(sql)}")
+                cur.execute("RELEASE SAVEPOINT prepare_statement")
+                conn.prepared.add(name)
+            except psycopg2.Error:
+                cur.execute("ROLLBACK TO SAVEPOINT prepare_statement")
+    conn.commit()
+
+
+def execute_hot(cur, name, params):
+    """
+    Executes one of PREPARED_STATEMENTS, using the server-side prepared plan when the
+    cursor's connection has it and the plain statement otherwise.
+    """
+    if name in getattr(cur.connection, 'prepared', ()):
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(PREPARED_STATEMENTS[name][0], params)
+
+
+@contextmanager
+def db_session(prepare=False):
+    """
+    Checks a connection out of the process pool for the duration of a `with` block.
+
+    When DB_POOL_MAX connections are already checked out, the caller waits for one to be
+    returned. Stale or broken connections are replaced before use. Any transaction left open
+    when the block exits (normally or through an exception) is rolled back before the connection
+    goes back to the pool, so callers commit explicitly like with connect_db.
+
+    :param prepare: Prepare the hot insert/upsert statements on the connection
+    :return: Database connection
+    """
+    pool = get_pool()
+    slots = _pool_slots
+    slots.acquire()
+    try:
+        conn = pool.getconn()
+        if not _is_healthy(conn):
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+    except Exception:
+        slots.release()
+        raise
+
+    broken = False
+    try:
+        if prepare:
+            prepare_statements(conn)
+        yield conn
+    finally:
+        try:
+            if not conn.closed and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        conn.last_used = time.monotonic()
+        try:
+            pool.putconn(conn, close=broken or bool(conn.closed))
+        finally:
+            slots.release()
+
+
 def insert_data(conn, row):
     """
     Inserts data into the main table and platform-specific tables based on the platform type.
-    Checks for duplicate entries to prevent duplication.
+    Duplicates are resolved by the unique content fingerprint with INSERT ... ON CONFLICT.
     Additionally, inserts each unique word from the text into a separate 'word_data' table.
+    New posts are added to the daily rollup tables.
 
     :param conn: Database connection
     :param row: Dictionary containing the data to insert
     """
+    ensure_partitions(conn, [row['Date']])
     try:
         with conn.cursor() as cur:
-            # Check if the data already exists in main_data
-            cur.execute("""
-                SELECT id FROM main_data
-                WHERE text = %s AND user_handle = %s AND date = %s AND platform = %s
-            """, (row['Text'], row['User'], row['Date'], row['Platform']))
+            fingerprint = post_fingerprint(row['Platform'], row['User'], row['Date'], row['Text'])
+            execute_hot(cur, 'insert_main', (row['Text'], row['User'], row['Likes'], row['Reposts'], row['Date'], row['Platform'], row['Scraped At'], row['Sentiment'], fingerprint))
             main_result = cur.fetchone()
 
-            if main_result:
-                main_id = main_result[0]
+            if main_result is None:
+                execute_hot(cur, 'select_main_id', (fingerprint,))
+                main_id, date = cur.fetchone()
                 print(f"Duplicate found in main_data for ID: {main_id}")
             else:
-                # Insert into main_data
-                cur.execute("""
-                    INSERT INTO main_data (text, user_handle, likes, reposts, date, platform, scraped_at, sentiment)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
-                """, (row['Text'], row['User'], row['Likes'], row['Reposts'], row['Date'], row['Platform'], row['Scraped At'], row['Sentiment']))
-                main_id = cur.fetchone()[0]  # Get the ID of the inserted row
+                main_id, date = main_result  # ID and stored date of the inserted row
                 print(f"Data inserted into main_data with ID: {main_id}")
 
-                # Split text into words, convert each to lowercase, and insert into word_data
-                words = set(row['Text'].split())  # Use a set to avoid duplicate words
-                for word in words:
-                    cleaned_word = re.sub(r'[^\w\s]', '', word.lower())
-                    cur.execute("""
-                        INSERT INTO word_data (main_id, word)
-                        VALUES (%s, %s)
-                    """, (main_id, cleaned_word))
+                # Split text into words, convert each to lowercase, and insert their ids into word_data
+                words = _extract_words(row['Text'])
+                word_ids = vocabulary.ids_for(cur, words)
+                if word_ids:
+                    execute_values(cur, """
+                        INSERT INTO word_data (main_id, word_id, date)
+                        VALUES %s
+                    """, [(main_id, word_id, date) for word_id in word_ids.values()])
                 print(f"{len(words)} words inserted for main_id: {main_id}")
+                apply_rollup_delta(cur, [main_id])
 
-            # Additional logic for platform-specific tables
-            if row['Platform'].lower() == 'twitter':
-                # Check for duplicates in twitter_data
-                cur.execute("""
-                    SELECT id FROM twitter_data
-                    WHERE main_id = %s AND status_id = %s
-                """, (main_id, row['Status ID']))
-                twitter_result = cur.fetchone()
-
-                if twitter_result:
-                    print(f"Duplicate found in twitter_data for main_id: {main_id}")
-                else:
-                    cur.execute("""
-                        INSERT INTO twitter_data (main_id, views, status_id)
-                        VALUES (%s, %s, %s)
-                    """, (main_id, row['Views'], row['Status ID']))
-                    print(f"Data inserted into twitter_data for main_id: {main_id}")
-
-            elif row['Platform'].lower() == 'threads':
-                # Check for duplicates in thread_data
-                cur.execute("""
-                    SELECT id FROM thread_data
-                    WHERE main_id = %s
-                """, (main_id,))
-                thread_result = cur.fetchone()
-
-                if thread_result:
-                    print(f"Duplicate found in thread_data for main_id: {main_id}")
-                else:
-                    cur.execute("""
-                        INSERT INTO thread_data (main_id, replies)
-                        VALUES (%s, %s)
-                    """, (main_id, row['Replies']))
-                    print(f"Data inserted into thread_data for main_id: {main_id}")
+                # Platform-specific rows are written for new posts only: the (status_id, date) key
+                # treats NULL Status IDs as distinct, so rows for existing posts would pile up
+                if row['Platform'].lower() == 'twitter':
+                    execute_hot(cur, 'upsert_twitter', (main_id, row['Views'], row['Status ID'], date))
+                    print(f"Data upserted into twitter_data for main_id: {main_id}")
+
+                elif row['Platform'].lower() == 'threads':
+                    execute_hot(cur, 'upsert_thread', (main_id, row['Replies'], date))
+                    print(f"Data upserted into thread_data for main_id: {main_id}")
 
             conn.commit()
     except Exception as e:
         conn.rollback()
+        vocabulary.clear()
         raise Exception(f"Error inserting data: {e}")
 
 
+MAIN_COLUMNS = ['Text', 'User', 'Likes', 'Reposts', 'Date', 'Platform', 'Scraped At', 'Sentiment']
+
+
+def _to_records(df, columns):
+    """Convert DataFrame columns into a list of tuples with Python scalars and None for NaN."""
+    frame = df[columns].astype(object)
+    frame = frame.where(frame.notna(), None)
+    return list(frame.itertuples(index=False, name=None))
+
+
+def post_fingerprint(platform, user, date, text):
+    """
+    Content fingerprint of a post: md5 over platform, user, UTC date and text.
+    Must stay identical to the SQL backfill in db/schema.py (migration 2).
+    """
+    timestamp = pd.to_datetime(date, utc=True, errors='coerce', format='mixed') if date is not None else pd.NaT
+    date_part = '' if pd.isna(timestamp) else timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')
+    parts = [platform or '', user or '', date_part, text or '']
+    return hashlib.md5('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _extract_words(text):
+    """Split text into distinct lowercase words with punctuation removed."""
+    words = {re.sub(r'[^\w\s]', '', word.lower()) for word in set(text.split())}
+    words.discard('')
+    return words
+
+
+class WordVocabulary:
+    """
+    In-process LRU cache of the vocabulary table (word -> word_id).
+
+    Words missing from the cache are resolved in bulk: one INSERT ... ON CONFLICT DO NOTHING
+    RETURNING for new words and one lookup for words another loader already added.
+    """
+
+    def __init__(self, maxsize=200_000):
+        self.maxsize = maxsize
+        self._ids = OrderedDict()
+
+    def clear(self):
+        """Drops cached ids, e.g. after a rollback that may have discarded new words."""
+        self._ids.clear()
+
+    def _remember(self, word, word_id):
+        self._ids[word] = word_id
+        self._ids.move_to_end(word)
+        if len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def ids_for(self, cur, words, page_size=1000):
+        """
+        Returns a word -> word_id mapping for all given words, inserting unknown words.
+
+        :param cur: Cursor inside the caller's transaction
+        :param words: Iterable of words
+        :param page_size: Number of rows per execute_values statement
+        """
+        result = {}
+        missing = []
+        for word in dict.fromkeys(words):
+            word_id = self._ids.get(word)
+            if word_id is None:
+                missing.append(word)
+            else:
+                self._ids.move_to_end(word)
+                result[word] = word_id
+
+        if missing:
+            found = dict(execute_values(cur, """
+                INSERT INTO vocabulary (word) VALUES %s
+                ON CONFLICT (word) DO NOTHING
+                RETURNING word, word_id
+            """, [(word,) for word in missing], page_size=page_size, fetch=True))
+            known = [word for word in missing if word not in found]
+            if known:
+                cur.execute("SELECT word, word_id FROM vocabulary WHERE word = ANY(%s)", (known,))
+                found.update(cur.fetchall())
+            for word, word_id in found.items():
+                self._remember(word, word_id)
+            result.update(found)
+
+        return result
+
+
+vocabulary = WordVocabulary()
+
+
+def insert_dataframe(conn, df, page_size=1000):
+    """
+    Bulk-inserts a whole DataFrame into main_data, the platform-specific tables and word_data
+    in a single transaction.
+
+    Each post gets a content fingerprint; new posts are inserted with execute_values and
+    INSERT ... ON CONFLICT (fingerprint, date) DO NOTHING, so deduplication is a unique index
+    probe inside the insert. Ids of posts that already existed are fetched with one lookup by
+    fingerprint, bounded to the batch's date range so only its month partitions are read.
+    Missing month partitions are created before the insert transaction. Child table rows are written
+    for new posts only, with ON CONFLICT on their unique keys. Words of new posts are
+    mapped to vocabulary ids through the LRU-cached `vocabulary` and word_data is written with COPY.
+    The daily rollup tables are updated with the newly inserted posts in the same transaction.
+
+    :param conn: Database connection
+    :param df: DataFrame with the cleaned pipeline columns
+    :param page_size: Number of rows per execute_values statement
+    :return: Dictionary with row, inserted, duplicate and word counts
+    """
+    if df.empty:
+        return {'rows': 0, 'inserted': 0, 'duplicates': 0, 'words': 0}
+
+    df = df.reset_index(drop=True)
+    df['Date'] = pd.to_datetime(df['Date'], utc=True, errors='coerce', format='mixed')
+    records = _to_records(df, MAIN_COLUMNS)
+    fingerprints = [post_fingerprint(r[5], r[1], r[4], r[0]) for r in records]
+    df['fingerprint'] = fingerprints
+
+    # First occurrence of every fingerprint in the batch
+    first_positions = {}
+    for pos, fingerprint in enumerate(fingerprints):
+        first_positions.setdefault(fingerprint, pos)
+
+    ensure_partitions(conn, df['Date'])
+    try:
+        with conn.cursor() as cur:
+            inserted = execute_values(cur, """
+                INSERT INTO main_data (text, user_handle, likes, reposts, date, platform, scraped_at, sentiment, fingerprint)
+                VALUES %s
+                ON CONFLICT (fingerprint, date) DO NOTHING
+                RETURNING fingerprint, id
+            """, [(*records[pos], fp) for fp, pos in first_positions.items()], page_size=page_size, fetch=True)
+            new_ids = dict(inserted)
+
+            # Ids of posts that were already stored
+            fingerprint_ids = dict(new_ids)
+            existing = [fp for fp in first_positions if fp not in new_ids]
+            if existing:
+                dates = df['Date'].dropna()
+                first_date, last_date = (dates.min(), dates.max()) if len(dates) else (None, None)
+                execute_hot(cur, 'select_main_ids', (existing, first_date, last_date))
+                fingerprint_ids.update(cur.fetchall())
+            df['main_id'] = df['fingerprint'].map(fingerprint_ids)
+
+            # Platform-specific tables, for new posts only: the (status_id, date) key treats
+            # NULL Status IDs as distinct, so rows for existing posts would pile up on every reload
+            new_posts = df[df['fingerprint'].isin(new_ids.keys())]
+            platform = new_posts['Platform'].str.lower()
+            twitter = new_posts[platform == 'twitter'].copy()
+            status_id = twitter['Status ID'].astype(str)
+            twitter['Status ID'] = status_id.where(status_id.str.fullmatch(r'\d+'))
+            # Tweets without a Status ID are deduplicated per post, not collapsed into one row
+            tweet_key = twitter['Status ID'].fillna('main_id:' + twitter['main_id'].astype(str))
+            twitter_rows = _to_records(twitter[~tweet_key.duplicated()], ['main_id', 'Views', 'Status ID', 'Date'])
+            if twitter_rows:
+                execute_values(cur, """
+                    INSERT INTO twitter_data (main_id, views, status_id, date)
+                    VALUES %s
+                    ON CONFLICT (status_id, date) DO NOTHING
+                """, twitter_rows, page_size=page_size)
+
+            thread_rows = _to_records(new_posts[platform == 'threads'].drop_duplicates('main_id'), ['main_id', 'Replies', 'Date'])
+            if thread_rows:
+                execute_values(cur, """
+                    INSERT INTO thread_data (main_id, replies, date)
+                    VALUES %s
+                    ON CONFLICT (main_id, date) DO NOTHING
+                """, thread_rows, page_size=page_size)
+
+            # Word ids for newly inserted posts only, streamed with COPY
+            post_words = {
+                main_id: _extract_words(records[first_positions[fingerprint]][0])
+                for fingerprint, main_id in new_ids.items()
+            }
+            post_dates = {
+                main_id: records[first_positions[fingerprint]][4]
+                for fingerprint, main_id in new_ids.items()
+            }
+            word_ids = vocabulary.ids_for(cur, (word for words in post_words.values() for word in words), page_size)
+            word_buffer = io.StringIO()
+            word_count = 0
+            for main_id, words in post_words.items():
+                date = post_dates[main_id]
+                date = '\\N' if date is None else date.isoformat()
+                for word in words:
+                    word_buffer.write(f"{main_id}\t{word_ids[word]}\t{date}\n")
+                    word_count += 1
+            word_buffer.seek(0)
+            cur.copy_expert("COPY word_data (main_id, word_id, date) FROM STDIN", word_buffer)
+
+            # Dashboard rollups get only the posts inserted by this batch
+            apply_rollup_delta(cur, new_ids.values())
+
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        vocabulary.clear()
+        raise Exception(f"Error bulk inserting data: {e}")
+
+    summary = {
+        'rows': len(df),
+        'inserted': len(new_ids),
+        'duplicates': len(df) - len(new_ids),
+        'words': word_count
+    }
+    print(f"Bulk insert: {summary['inserted']} new posts, {summary['duplicates']} duplicates, {word_count} words.")
+    return summary
+
+
 # def insert_data(conn, row):
 #     """
 #     Inserts data into the main table and platform-specific tables based on the platform type.
@@ -0,0 +1,160 @@
+"""
+Monthly range partitions of main_data and its child tables (migration 5).
+
+Every partitioned table has one partition per UTC month, named `<table>_yYYYYmMM`,
+plus a `<table>_undated` default partition for posts without a date. The loader calls
+`ensure_partitions` before inserting; old months can be detached into the `archive`
+schema or dropped. The rollup tables are not partitioned, so dashboard history
+survives retention.
+
+Usage (from the `src` directory):
+    python -m db.partitions list
+    python -m db.partitions retain --keep-months 24 [--drop]
+"""
+
+import argparse
+import pandas as pd
+
+# Child tables first: their foreign keys must go before the referenced main_data partition
+PARTITIONED_TABLES = ['word_data', 'twitter_data', 'thread_data', 'main_data']
+ARCHIVE_SCHEMA = 'archive'
+
+
+def partition_months(dates):
+    """
+    Distinct UTC months of the given dates as 'YYYY-MM-01' strings.
+
+    :param dates: Iterable or Series of date values; missing or unparsable values are ignored
+    """
+    parsed = pd.to_datetime(pd.Series(dates, dtype=object), utc=True, errors='coerce', format='mixed').dropna()
+    return sorted(parsed.dt.strftime('%Y-%m-01').unique())
+
+
+def ensure_partitions(conn, dates):
+    """
+    Creates the month partitions needed for `dates` in a short transaction of its own,
+    so the insert transaction that follows does not hold locks on the parent tables.
+
+    :param conn: Database connection
+    :param dates: Date values of the rows about to be inserted
+    :return: Number of partitions created
+    """
+    months = partition_months(dates)
+    if not months:
+        return 0
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT create_month_partitions(%s::date[])", (months,))
+            created = cur.fetchone()[0]
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Error creating partitions: {e}")
+    if created:
+        print(f"Created {created} partition(s) for {len(months)} month(s).")
+    return created
+
+
+def list_partitions(conn, parent='main_data'):
+    """
+    Returns (partition name, bound expression) for every partition of `parent`.
+
+    :param conn: Database connection
+    :param parent: Partitioned table name
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            ORDER BY c.relname
+        """, (parent,))
+        partitions = cur.fetchall()
+    conn.commit()
+    return partitions
+
+
+def retain_partitions(conn, keep_months, drop=False):
+    """
+    Detaches the month partitions older than the last `keep_months` months (counting the
+    current UTC month) from every partitioned table. Detached tables are moved to the
+    `archive` schema, or dropped when `drop` is set. Posts loaded again for a removed
+    month go into a fresh partition and are not deduplicated against the archive.
+
+    :param conn: Database connection
+    :param keep_months: Number of recent months to keep attached
+    :param drop: Drop detached partitions instead of archiving them
+    :return: List of the month suffixes ('yYYYYmMM') that were removed
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1")
+    cutoff = (pd.Timestamp.now(tz='UTC').tz_localize(None).to_period('M') - (keep_months - 1)).strftime('y%Ym%m')
+    months = sorted(
+        name[len('main_data_'):] for name, _ in list_partitions(conn)
+        if name != 'main_data_undated' and name[len('main_data_'):] < cutoff
+    )
+    if not months:
+        return []
+
+    try:
+        with conn.cursor() as cur:
+            if not drop:
+                cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+            for month in months:
+                for parent in PARTITIONED_TABLES:
+                    partition = f"{parent}_{month}"
+                    cur.execute("SELECT to_regclass(%s)", (partition,))
+                    if cur.fetchone()[0] is None:
+                        continue
+                    cur.execute(f"ALTER TABLE {parent} DETACH PARTITION {partition}")
+                    # A detached child keeps its foreign key to main_data, which would
+                    # block detaching the referenced main_data partition
+                    cur.execute("""
+                        SELECT conname FROM pg_constraint
+                        WHERE conrelid = %s::regclass AND contype = 'f' AND confrelid = 'main_data'::regclass
+                    """, (partition,))
+                    for (constraint,) in cur.fetchall():
+                        cur.execute(f'ALTER TABLE {partition} DROP CONSTRAINT "{constraint}"')
+                    if drop:
+                        cur.execute(f"DROP TABLE {partition}")
+                        continue
+                    cur.execute("SELECT to_regclass(%s)", (f"{ARCHIVE_SCHEMA}.{partition}",))
+                    if cur.fetchone()[0] is None:
+                        cur.execute(f"ALTER TABLE {partition} SET SCHEMA {ARCHIVE_SCHEMA}")
+                    else:
+                        # Month archived before and loaded again since: merge into the archive
+                        cur.execute(f"INSERT INTO {ARCHIVE_SCHEMA}.{partition} SELECT * FROM {partition}")
+                        cur.execute(f"DROP TABLE {partition}")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Error detaching partitions: {e}")
+
+    action = "Dropped" if drop else f"Archived to schema '{ARCHIVE_SCHEMA}'"
+    print(f"{action}: {len(months)} month(s) older than {cutoff}.")
+    return months
+
+
+if __name__ == "__main__":
+    from db.db_operations import db_session, close_pool
+    from db.schema import apply_migrations
+
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of main_data.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('list', help="List the partitions of main_data.")
+    retain = subcommands.add_parser('retain', help="Detach partitions older than the retention window.")
+    retain.add_argument('--keep-months', type=int, required=True, help="Number of recent months to keep.")
+    retain.add_argument('--drop', action='store_true', help="Drop old partitions instead of archiving them.")
+    args = parser.parse_args()
+
+    try:
+        with db_session() as conn:
+            apply_migrations(conn)
+            if args.command == 'list':
+                for name, bound in list_partitions(conn):
+                    print(f"{name}: {bound}")
+            else:
+                retain_partitions(conn, args.keep_months, drop=args.drop)
+    finally:
+        close_pool()
@@ -0,0 +1,150 @@
+"""
+Rollup tables for the Tableau dashboard.
+
+`daily_sentiment` and `daily_word_counts` are kept up to date by the loader: every
+insert adds only the aggregates of the posts it newly inserted (duplicates never reach
+the rollups), inside the same transaction. Days are UTC calendar days; posts without a
+date are left out. Use the rebuild command after backfills or manual edits. By default
+it starts at the oldest month partition still attached to main_data, so days whose
+partitions were archived or dropped by retention keep their rollups:
+
+Usage (from the `src` directory):
+    python -m db.rollups rebuild [--since YYYY-MM-DD | --all]
+"""
+
+import argparse
+
+from db.partitions import list_partitions
+
+# Aggregates over a filtered set of main_data rows; {where} selects the rows
+_SENTIMENT_SELECT = """
+    SELECT (m.date AT TIME ZONE 'UTC')::date, coalesce(m.platform, ''), coalesce(m.sentiment, ''),
+           count(*), coalesce(sum(m.likes), 0), coalesce(sum(m.reposts), 0)
+    FROM main_data m
+    WHERE m.date IS NOT NULL AND {where}
+    GROUP BY 1, 2, 3
+"""
+_WORDS_SELECT = """
+    SELECT (m.date AT TIME ZONE 'UTC')::date, w.word_id, count(*)
+    FROM main_data m
+    JOIN word_data w ON w.main_id = m.id AND w.date = m.date
+    WHERE m.date IS NOT NULL AND {where}
+    GROUP BY 1, 2
+"""
+
+
+def apply_rollup_delta(cur, main_ids):
+    """
+    Adds newly inserted posts to the rollup tables.
+
+    Must be called inside the inserting transaction, after their word_data rows are
+    written, and only with ids that were actually inserted by that transaction.
+
+    :param cur: Cursor inside the loader's transaction
+    :param main_ids: Ids of the newly inserted main_data rows
+    """
+    main_ids = list(main_ids)
+    if not main_ids:
+        return
+    where = "m.id = ANY(%(ids)s)"
+    cur.execute(f"""
+        INSERT INTO daily_sentiment (date, platform, sentiment, count, likes, reposts)
+        {_SENTIMENT_SELECT.format(where=where)}
+        ON CONFLICT (date, platform, sentiment) DO UPDATE SET
+            count = daily_sentiment.count + EXCLUDED.count,
+            likes = daily_sentiment.likes + EXCLUDED.likes,
+            reposts = daily_sentiment.reposts + EXCLUDED.reposts
+    """, {'ids': main_ids})
+    cur.execute(f"""
+        INSERT INTO daily_word_counts (date, word_id, count)
+        {_WORDS_SELECT.format(where=where)}
+        ON CONFLICT (date, word_id) DO UPDATE SET
+            count = daily_word_counts.count + EXCLUDED.count
+    """, {'ids': main_ids})
+
+
+def oldest_attached_month(conn):
+    """
+    First day ('YYYY-MM-01') of the oldest month partition attached to main_data, or None.
+
+    :param conn: Database connection
+    """
+    months = sorted(
+        name[len('main_data_'):] for name, _ in list_partitions(conn)
+        if name != 'main_data_undated'
+    )
+    if not months:
+        return None
+    return f"{months[0][1:5]}-{months[0][6:8]}-01"
+
+
+def rebuild_rollups(conn, since=None, full=False):
+    """
+    Recomputes the rollup tables from main_data and word_data.
+
+    Without `since`, the rebuild starts at the oldest attached month partition: earlier
+    months may have been archived or dropped by retention, and re-aggregating only the
+    attached partitions would silently erase their history.
+
+    :param conn: Database connection
+    :param since: Optional first UTC day (date or 'YYYY-MM-DD') to rebuild; earlier days are kept
+    :param full: Rebuild every day, discarding rollups of months no longer in main_data
+    :return: Dictionary with the number of daily_sentiment and daily_word_counts rows written
+    """
+    if since is None and not full:
+        since = oldest_attached_month(conn)
+        if since is None:
+            print("No dated partitions attached to main_data; rollups left unchanged.")
+            return {'daily_sentiment': 0, 'daily_word_counts': 0}
+    if since is None:
+        day_filter, where, params = "TRUE", "TRUE", {}
+    else:
+        day_filter = "date >= %(since)s"
+        where = "m.date >= (%(since)s::date)::timestamp AT TIME ZONE 'UTC'"
+        params = {'since': since}
+
+    try:
+        with conn.cursor() as cur:
+            # Block concurrent loaders so no delta is applied between delete and re-insert
+            cur.execute("LOCK TABLE daily_sentiment, daily_word_counts IN EXCLUSIVE MODE")
+            cur.execute(f"DELETE FROM daily_sentiment WHERE {day_filter}", params)
+            cur.execute(f"DELETE FROM daily_word_counts WHERE {day_filter}", params)
+            cur.execute(f"""
+                INSERT INTO daily_sentiment (date, platform, sentiment, count, likes, reposts)
+                {_SENTIMENT_SELECT.format(where=where)}
+            """, params)
+            sentiment_rows = cur.rowcount
+            cur.execute(f"""
+                INSERT INTO daily_word_counts (date, word_id, count)
+                {_WORDS_SELECT.format(where=where)}
+            """, params)
+            word_rows = cur.rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Error rebuilding rollups: {e}")
+
+    print(f"Rollups rebuilt: {sentiment_rows} daily_sentiment rows, {word_rows} daily_word_counts rows.")
+    return {'daily_sentiment': sentiment_rows, 'daily_word_counts': word_rows}
+
+
+if __name__ == "__main__":
+    from db.db_operations import db_session, close_pool
+    from db.schema import apply_migrations
+
+    parser = argparse.ArgumentParser(description="Maintain the dashboard rollup tables.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    rebuild = subcommands.add_parser('rebuild', help="Recompute rollups from main_data and word_data.")
+    scope = rebuild.add_mutually_exclusive_group()
+    scope.add_argument('--since', default=None,
+                       help="First UTC day to rebuild (YYYY-MM-DD); default the oldest attached partition.")
+    scope.add_argument('--all', action='store_true',
+                       help="Rebuild every day, dropping rollups of archived or dropped months.")
+    args = parser.parse_args()
+
+    try:
+        with db_session() as conn:
+            apply_migrations(conn)
+            rebuild_rollups(conn, since=args.since, full=args.all)
+    finally:
+        close_pool()
@@ -0,0 +1,345 @@
+"""
+Schema migrations for the pipeline database.
+
+Migrations are applied in order and recorded in `schema_migrations`, so running
+`apply_migrations` on every load is cheap once the database is up to date.
+
+Usage (from the `src` directory):
+    python -m db.schema
+"""
+
+# Advisory lock key shared by every process that runs migrations
+MIGRATION_LOCK_ID = 815_001
+
+# Ordered list of (version, description, SQL). Never edit an applied migration;
+# append a new one instead.
+MIGRATIONS = [
+    (1, "baseline tables", """
+        CREATE TABLE IF NOT EXISTS main_data (
+            id SERIAL PRIMARY KEY,
+            text TEXT,
+            user_handle TEXT,
+            likes INTEGER,
+            reposts INTEGER,
+            date TIMESTAMPTZ,
+            platform TEXT,
+            scraped_at TIMESTAMP,
+            sentiment TEXT
+        );
+        CREATE TABLE IF NOT EXISTS word_data (
+            id SERIAL PRIMARY KEY,
+            main_id INTEGER REFERENCES main_data (id),
+            word TEXT
+        );
+        CREATE TABLE IF NOT EXISTS twitter_data (
+            id SERIAL PRIMARY KEY,
+            main_id INTEGER REFERENCES main_data (id),
+            views INTEGER,
+            status_id TEXT
+        );
+        CREATE TABLE IF NOT EXISTS thread_data (
+            id SERIAL PRIMARY KEY,
+            main_id INTEGER REFERENCES main_data (id),
+            replies INTEGER
+        );
+    """),
+    (2, "content fingerprint and unique keys", """
+        ALTER TABLE main_data ADD COLUMN IF NOT EXISTS fingerprint TEXT;
+
+        -- Must stay identical to db_operations.post_fingerprint
+        UPDATE main_data
+        SET fingerprint = md5(concat_ws(E'\\x1f',
+            coalesce(platform, ''),
+            coalesce(user_handle, ''),
+            coalesce(to_char(date AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US'), ''),
+            coalesce(text, '')
+        ))
+        WHERE fingerprint IS NULL;
+
+        -- Merge existing duplicates into the oldest row before adding unique keys
+        CREATE TEMP TABLE main_duplicates ON COMMIT DROP AS
+        SELECT id, keep_id
+        FROM (SELECT id, min(id) OVER (PARTITION BY fingerprint) AS keep_id FROM main_data) d
+        WHERE id <> keep_id;
+
+        UPDATE twitter_data t SET main_id = d.keep_id FROM main_duplicates d WHERE t.main_id = d.id;
+        UPDATE thread_data t SET main_id = d.keep_id FROM main_duplicates d WHERE t.main_id = d.id;
+        DELETE FROM word_data w USING main_duplicates d WHERE w.main_id = d.id;
+        DELETE FROM main_data m USING main_duplicates d WHERE m.id = d.id;
+        DELETE FROM twitter_data t USING twitter_data o WHERE t.status_id = o.status_id AND t.id > o.id;
+        DELETE FROM thread_data t USING thread_data o WHERE t.main_id = o.main_id AND t.id > o.id;
+
+        ALTER TABLE main_data ALTER COLUMN fingerprint SET NOT NULL;
+        CREATE UNIQUE INDEX IF NOT EXISTS main_data_fingerprint_key ON main_data (fingerprint);
+        CREATE UNIQUE INDEX IF NOT EXISTS twitter_data_status_id_key ON twitter_data (status_id);
+        CREATE UNIQUE INDEX IF NOT EXISTS thread_data_main_id_key ON thread_data (main_id);
+    """),
+    (3, "dictionary-encoded word vocabulary", """
+        CREATE TABLE vocabulary (
+            word_id SERIAL PRIMARY KEY,
+            word TEXT NOT NULL UNIQUE
+        );
+        INSERT INTO vocabulary (word)
+        SELECT DISTINCT word FROM word_data WHERE word IS NOT NULL AND word <> '';
+
+        -- Rebuild word_data as (main_id, word_id) instead of rewriting every row in place
+        CREATE TABLE word_data_ids (
+            main_id INTEGER NOT NULL REFERENCES main_data (id),
+            word_id INTEGER NOT NULL REFERENCES vocabulary (word_id),
+            PRIMARY KEY (main_id, word_id)
+        );
+        INSERT INTO word_data_ids (main_id, word_id)
+        SELECT DISTINCT w.main_id, v.word_id
+        FROM word_data w
+        JOIN vocabulary v ON v.word = w.word
+        WHERE w.main_id IS NOT NULL;
+
+        DROP TABLE word_data;
+        ALTER TABLE word_data_ids RENAME TO word_data;
+        ALTER TABLE word_data RENAME CONSTRAINT word_data_ids_pkey TO word_data_pkey;
+        CREATE INDEX word_data_word_id_idx ON word_data (word_id);
+
+        -- Text view for dashboards that still read (main_id, word)
+        CREATE VIEW word_data_text AS
+        SELECT w.main_id, v.word
+        FROM word_data w
+        JOIN vocabulary v ON v.word_id = w.word_id;
+    """),
+    (4, "daily rollup tables", """
+        -- Maintained incrementally by db/rollups.py; days are UTC calendar days
+        CREATE TABLE daily_sentiment (
+            date DATE NOT NULL,
+            platform TEXT NOT NULL,
+            sentiment TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            likes BIGINT NOT NULL,
+            reposts BIGINT NOT NULL,
+            PRIMARY KEY (date, platform, sentiment)
+        );
+        CREATE TABLE daily_word_counts (
+            date DATE NOT NULL,
+            word_id INTEGER NOT NULL REFERENCES vocabulary (word_id),
+            count INTEGER NOT NULL,
+            PRIMARY KEY (date, word_id)
+        );
+
+        INSERT INTO daily_sentiment (date, platform, sentiment, count, likes, reposts)
+        SELECT (date AT TIME ZONE 'UTC')::date, coalesce(platform, ''), coalesce(sentiment, ''),
+               count(*), coalesce(sum(likes), 0), coalesce(sum(reposts), 0)
+        FROM main_data
+        WHERE date IS NOT NULL
+        GROUP BY 1, 2, 3;
+
+        INSERT INTO daily_word_counts (date, word_id, count)
+        SELECT (m.date AT TIME ZONE 'UTC')::date, w.word_id, count(*)
+        FROM main_data m
+        JOIN word_data w ON w.main_id = m.id
+        WHERE m.date IS NOT NULL
+        GROUP BY 1, 2;
+
+        -- Top words view for the dashboard
+        CREATE VIEW daily_word_counts_text AS
+        SELECT d.date, v.word, d.count
+        FROM daily_word_counts d
+        JOIN vocabulary v ON v.word_id = d.word_id;
+    """),
+    (5, "monthly range partitions on date", """
+        -- Creates the UTC month partitions of main_data and its child tables that do not
+        -- exist yet. Called by db/partitions.ensure_partitions before every load.
+        CREATE FUNCTION create_month_partitions(months DATE[]) RETURNS INTEGER
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            month DATE;
+            parent TEXT;
+            partition TEXT;
+            created INTEGER := 0;
+        BEGIN
+            FOREACH month IN ARRAY months LOOP
+                month := date_trunc('month', month)::date;
+                FOREACH parent IN ARRAY ARRAY['main_data', 'twitter_data', 'thread_data', 'word_data'] LOOP
+                    partition := parent || to_char(month, '"_y"YYYY"m"MM');
+                    IF to_regclass(partition) IS NULL THEN
+                        -- Serialize concurrent loaders creating the same partition
+                        PERFORM pg_advisory_xact_lock(815002);
+                        IF to_regclass(partition) IS NULL THEN
+                            EXECUTE format(
+                                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                                partition, parent,
+                                month::timestamp AT TIME ZONE 'UTC',
+                                (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                            );
+                            created := created + 1;
+                        END IF;
+                    END IF;
+                END LOOP;
+            END LOOP;
+            RETURN created;
+        END
+        $$;
+
+        -- Move the heap tables and their index names out of the way
+        DROP VIEW word_data_text;
+        ALTER TABLE main_data RENAME TO main_data_heap;
+        ALTER TABLE twitter_data RENAME TO twitter_data_heap;
+        ALTER TABLE thread_data RENAME TO thread_data_heap;
+        ALTER TABLE word_data RENAME TO word_data_heap;
+        ALTER INDEX IF EXISTS main_data_pkey RENAME TO main_data_heap_pkey;
+        ALTER INDEX IF EXISTS main_data_fingerprint_key RENAME TO main_data_heap_fingerprint_key;
+        ALTER INDEX IF EXISTS twitter_data_pkey RENAME TO twitter_data_heap_pkey;
+        ALTER INDEX IF EXISTS twitter_data_status_id_key RENAME TO twitter_data_heap_status_id_key;
+        ALTER INDEX IF EXISTS thread_data_pkey RENAME TO thread_data_heap_pkey;
+        ALTER INDEX IF EXISTS thread_data_main_id_key RENAME TO thread_data_heap_main_id_key;
+        ALTER INDEX IF EXISTS word_data_pkey RENAME TO word_data_heap_pkey;
+        ALTER INDEX IF EXISTS word_data_word_id_idx RENAME TO word_data_heap_word_id_idx;
+
+        -- Unique keys must contain the partition key. Posts without a date live in the
+        -- *_undated default partitions, so the keys treat NULL dates as equal.
+        CREATE TABLE main_data (
+            id INTEGER NOT NULL DEFAULT nextval('main_data_id_seq'),
+            text TEXT,
+            user_handle TEXT,
+            likes INTEGER,
+            reposts INTEGER,
+            date TIMESTAMPTZ,
+            platform TEXT,
+            scraped_at TIMESTAMP,
+            sentiment TEXT,
+            fingerprint TEXT NOT NULL,
+            CONSTRAINT main_data_id_date_key UNIQUE NULLS NOT DISTINCT (id, date),
+            CONSTRAINT main_data_fingerprint_key UNIQUE NULLS NOT DISTINCT (fingerprint, date)
+        ) PARTITION BY RANGE (date);
+        CREATE TABLE twitter_data (
+            id INTEGER NOT NULL DEFAULT nextval('twitter_data_id_seq'),
+            main_id INTEGER,
+            views INTEGER,
+            status_id TEXT,
+            date TIMESTAMPTZ,
+            CONSTRAINT twitter_data_id_date_key UNIQUE NULLS NOT DISTINCT (id, date),
+            CONSTRAINT twitter_data_status_id_key UNIQUE (status_id, date),
+            FOREIGN KEY (main_id, date) REFERENCES main_data (id, date)
+        ) PARTITION BY RANGE (date);
+        CREATE TABLE thread_data (
+            id INTEGER NOT NULL DEFAULT nextval('thread_data_id_seq'),
+            main_id INTEGER,
+            replies INTEGER,
+            date TIMESTAMPTZ,
+            CONSTRAINT thread_data_id_date_key UNIQUE NULLS NOT DISTINCT (id, date),
+            CONSTRAINT thread_data_main_id_key UNIQUE NULLS NOT DISTINCT (main_id, date),
+            FOREIGN KEY (main_id, date) REFERENCES main_data (id, date)
+        ) PARTITION BY RANGE (date);
+        CREATE TABLE word_data (
+            main_id INTEGER NOT NULL,
+            word_id INTEGER NOT NULL REFERENCES vocabulary (word_id),
+            date TIMESTAMPTZ,
+            CONSTRAINT word_data_key UNIQUE NULLS NOT DISTINCT (main_id, word_id, date),
+            FOREIGN KEY (main_id, date) REFERENCES main_data (id, date)
+        ) PARTITION BY RANGE (date);
+        CREATE INDEX word_data_word_id_idx ON word_data (word_id);
+
+        -- The CHECK lets the planner prune the undated partitions from date range queries
+        -- and rejects dated rows whose month partition was not created
+        CREATE TABLE main_data_undated PARTITION OF main_data DEFAULT;
+        CREATE TABLE twitter_data_undated PARTITION OF twitter_data DEFAULT;
+        CREATE TABLE thread_data_undated PARTITION OF thread_data DEFAULT;
+        CREATE TABLE word_data_undated PARTITION OF word_data DEFAULT;
+        ALTER TABLE main_data_undated ADD CONSTRAINT main_data_undated_check CHECK (date IS NULL);
+        ALTER TABLE twitter_data_undated ADD CONSTRAINT twitter_data_undated_check CHECK (date IS NULL);
+        ALTER TABLE thread_data_undated ADD CONSTRAINT thread_data_undated_check CHECK (date IS NULL);
+        ALTER TABLE word_data_undated ADD CONSTRAINT word_data_undated_check CHECK (date IS NULL);
+
+        SELECT create_month_partitions(ARRAY(
+            SELECT DISTINCT date_trunc('month', date AT TIME ZONE 'UTC')::date
+            FROM main_data_heap
+            WHERE date IS NOT NULL
+        ));
+
+        INSERT INTO main_data (id, text, user_handle, likes, reposts, date, platform, scraped_at, sentiment, fingerprint)
+        SELECT id, text, user_handle, likes, reposts, date, platform, scraped_at, sentiment, fingerprint
+        FROM main_data_heap;
+        INSERT INTO twitter_data (id, main_id, views, status_id, date)
+        SELECT t.id, t.main_id, t.views, t.status_id, m.date
+        FROM twitter_data_heap t
+        LEFT JOIN main_data_heap m ON m.id = t.main_id;
+        INSERT INTO thread_data (id, main_id, replies, date)
+        SELECT t.id, t.main_id, t.replies, m.date
+        FROM thread_data_heap t
+        LEFT JOIN main_data_heap m ON m.id = t.main_id;
+        INSERT INTO word_data (main_id, word_id, date)
+        SELECT w.main_id, w.word_id, m.date
+        FROM word_data_heap w
+        JOIN main_data_heap m ON m.id = w.main_id;
+
+        ALTER SEQUENCE main_data_id_seq OWNED BY main_data.id;
+        ALTER SEQUENCE twitter_data_id_seq OWNED BY twitter_data.id;
+        ALTER SEQUENCE thread_data_id_seq OWNED BY thread_data.id;
+        DROP TABLE word_data_heap, twitter_data_heap, thread_data_heap, main_data_heap;
+
+        CREATE VIEW word_data_text AS
+        SELECT w.main_id, w.date, v.word
+        FROM word_data w
+        JOIN vocabulary v ON v.word_id = w.word_id;
+    """),
+]
+
+
+def applied_versions(conn):
+    """Returns the set of migration versions already applied."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        cur.execute("SELECT version FROM schema_migrations")
+        versions = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return versions
+
+
+def apply_migrations(conn):
+    """
+    Applies every pending migration, each in its own transaction.
+
+    :param conn: Database connection
+    :return: List of versions applied in this call
+    """
+    done = applied_versions(conn)
+    applied = []
+    for version, description, sql in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with conn.cursor() as cur:
+                # Serialize concurrent loaders running migrations at the same time
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                # Backfills may run longer than the pool's statement timeout
+                cur.execute("SET LOCAL statement_timeout = 0")
+                cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                if cur.fetchone():
+                    conn.commit()
+                    continue
+                cur.execute(sql)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+            conn.commit()
+            applied.append(version)
+            print(f"Applied migration {version}: {description}")
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Error applying migration {version} ({description}): {e}")
+    return applied
+
+
+if __name__ == "__main__":
+    from db.db_operations import db_session, close_pool
+
+    try:
+        with db_session() as conn:
+            applied = apply_migrations(conn)
+        print(f"{len(applied)} migration(s) applied.")
+    finally:
+        close_pool()
@@ -1,68 +1,56 @@
-import os
-import pandas as pd
 import logging
-from utils.scrapping_twitter import scrape_twitter
-from utils.sentiment_labeller import label_sentiment
-from datetime import datetime, timedelta
-from utils.scrapping_threads import save_to_csv, scrape_threads_search
-from utils.normalize import convert_column_to_integer, convert_column_to_string
-from db.db_operations import connect_db, insert_data, close_connection
+from typing import Optional
+from db.db_operations import db_session, insert_dataframe, close_pool, PREPARE_STATEMENTS
+from db.schema import apply_migrations
+from utils.artifact_store import read_artifact, artifact_files, default_run_date
+
+
+def load_stage(run_date: Optional[str] = None) -> dict:
+    """
+    Stage load: memasukkan artifact 'cleaned' sebuah run ke PostgreSQL.
+
+    Parameters:
+    - run_date (str, optional): Tanggal run (YYYY-MM-DD); default `default_run_date()`.
+
+    Returns:
+    - dict: Ringkasan insert {'rows', 'inserted', 'duplicates', 'words'}.
+    """
+    run_date = run_date or default_run_date()
+    if not artifact_files('cleaned', run_date):
+        logging.info(f"No cleaned data for run_date={run_date}, nothing to load.")
+        return {'rows': 0, 'inserted': 0, 'duplicates': 0, 'words': 0}
+
+    logging.info("Loading cleaned data...")
+    cleaned_data = read_artifact('cleaned', run_date=run_date)
+    logging.info("Cleaned data loaded successfully.")
+
+    logging.info("Inserting data into PostgreSQL...")
+    with db_session(prepare=PREPARE_STATEMENTS) as conn:
+        apply_migrations(conn)
+        summary = insert_dataframe(conn, cleaned_data)
+    logging.info(
+        f"Data insertion completed successfully: {summary['inserted']} new rows, "
+        f"{summary['duplicates']} duplicates, {summary['words']} words."
+    )
+    return summary
 
-# Configure logging
-logging.basicConfig(
-    filename='data_pipeline.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        filename='data_pipeline.log',
+        filemode='a',
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
     logging.info("Starting Load process.")
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Path ke model
-    model_path = os.path.join(current_dir, "../models/indobert_2024-11-19_14-31-19")
-    cleaning_data = os.path.join(current_dir, "../cleaned_data.csv")
-    # Load data Twitter
-    try:
-        logging.info("Loading cleaned data...")
-        twitter_data = pd.read_csv(cleaning_data, dtype={'Status ID': str})
-        logging.info("Twitter data loaded successfully.")
-        print('===================================================================================================')
-        # print(twitter_data.isna().sum())
-        print('===================================================================================================')
-    except Exception as e:
-        logging.error(f"Error loading Twitter data: {e}")
-        exit()
 
     try:
-        logging.info("Inserting data into PostgreSQL...")
-        conn = connect_db()
-        for _, row in twitter_data.iterrows():
-            try:
-                insert_data(conn, {
-                    'Text': row['Text'],
-                    'Text': row['Text'],
-                    'User': row['User'],
-                    'Likes': row['Likes'],
-                    'Reposts': row['Reposts'],
-                    'Date': row['Date'],
-                    'Platform': row['Platform'],
-                    'Scraped At': row['Scraped At'],
-                    'Sentiment': row['Sentiment'],
-                    'Views': row['Views'],
-                    'Status ID': row['Status ID'],
-                    'Replies': row['Replies']
-                })
-                logging.info(f"Data inserted successfully for User: {row['User']} on Platform: {row['Platform']}.")
-            except Exception as inner_e:
-                logging.error(f"Error inserting row for User: {row['User']} on Platform: {row['Platform']}: {inner_e}")
-        logging.info("Data insertion completed successfully.")
+        load_stage()
     except Exception as e:
         logging.error(f"Error during data insertion: {e}")
         exit()
     finally:
-        close_connection(conn)
-        logging.info("Database connection closed.")
+        close_pool()
+        logging.info("Database connection pool closed.")
 
     logging.info("Program finished successfully.")
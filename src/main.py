@@ -2,11 +2,13 @@ import os
 import pandas as pd
 import logging
 from utils.scrapping_twitter import scrape_twitter
-from utils.sentiment_labeller import label_sentiment
 from datetime import datetime, timedelta
 from utils.scrapping_threads import save_to_csv, scrape_threads_search
-from utils.normalize import convert_column_to_integer, convert_column_to_string
-from db.db_operations import connect_db, insert_data, close_connection
+from utils.cleaning import clean_frame
+from db.db_operations import db_session, insert_dataframe, close_pool, PREPARE_STATEMENTS
+from db.schema import apply_migrations
+from utils.artifact_store import read_artifact, write_artifact
+from transform import label_data
 
 # Configure logging
 logging.basicConfig(
@@ -22,11 +24,11 @@ if __name__ == "__main__":
 
     # Path ke model
     model_path = os.path.join(current_dir, "../models/indobert_2024-11-19_14-31-19")
-    twitter_data = os.path.join(current_dir, "../twitter_data.csv")
+    sentiment_cache_path = os.path.join(current_dir, "../sentiment_cache.sqlite")
     # Load data Twitter
     try:
         logging.info("Loading Twitter data...")
-        twitter_data = pd.read_csv(twitter_data)
+        twitter_data = read_artifact('scraped', platform='twitter')
         logging.info("Twitter data loaded successfully.")
         print('===================================================================================================')
         # print(twitter_data.isna().sum())
@@ -38,7 +40,7 @@ if __name__ == "__main__":
     # Load data Thread
     try:
         logging.info("Loading Threads data...")
-        thread_data = pd.read_csv(os.path.join(current_dir, "../thread_data.csv"))
+        thread_data = read_artifact('scraped', platform='threads')
         logging.info("Threads data loaded successfully.")
         print('===================================================================================================')
         # print(thread_data.isna().sum())
@@ -54,7 +56,7 @@ if __name__ == "__main__":
         thread_data["Status ID"] = None
         twitter_data["Scraped At"] = datetime.now()
         combined_data = pd.concat([twitter_data, thread_data], ignore_index=True)
-        combined_data.to_csv('../combined_data.csv', index=False)
+        write_artifact(combined_data, 'combined')
         logging.info("Data combined successfully.")
     except Exception as e:
         logging.error(f"Error combining data: {e}")
@@ -63,7 +65,7 @@ if __name__ == "__main__":
     # Proses sentimen
     try:
         logging.info("Starting sentiment labelling...")
-        labelled_data = label_sentiment(combined_data, model_path)
+        labelled_data = label_data(combined_data, model_path, sentiment_cache_path)
         logging.info("Sentiment labelling completed successfully.")
         ('===================================================================================================')
         print(labelled_data.sample(5))
@@ -75,14 +77,7 @@ if __name__ == "__main__":
     # Data Cleaning
     try:
         logging.info("Starting data cleaning...")
-        labelled_data = convert_column_to_integer(labelled_data, "Likes")
-        labelled_data = convert_column_to_integer(labelled_data, "Views")
-        labelled_data = convert_column_to_integer(labelled_data, 'Replies')
-        labelled_data = convert_column_to_integer(labelled_data, 'Reposts')
-        labelled_data = convert_column_to_string(labelled_data, 'Status ID')
-        labelled_data['Date'] = pd.to_datetime(labelled_data['Date'], errors='coerce', utc=True)
-        labelled_data.drop_duplicates(inplace=True)
-        labelled_data['User'] = labelled_data['User'].str.replace(r'^@+', '', regex=True)
+        labelled_data = clean_frame(labelled_data)
         logging.info("Data cleaning completed successfully.")
     except Exception as e:
         logging.error(f"Error during data cleaning: {e}")
@@ -91,32 +86,18 @@ if __name__ == "__main__":
     # Insert data into PostgreSQL
     try:
         logging.info("Inserting data into PostgreSQL...")
-        conn = connect_db()
-        for _, row in labelled_data.iterrows():
-            try:
-                insert_data(conn, {
-                    'Text': row['Text'],
-                    'Text': row['Text'],
-                    'User': row['User'],
-                    'Likes': row['Likes'],
-                    'Reposts': row['Reposts'],
-                    'Date': row['Date'],
-                    'Platform': row['Platform'],
-                    'Scraped At': row['Scraped At'],
-                    'Sentiment': row['Sentiment'],
-                    'Views': row['Views'],
-                    'Status ID': row['Status ID'],
-                    'Replies': row['Replies']
-                })
-                logging.info(f"Data inserted successfully for User: {row['User']} on Platform: {row['Platform']}.")
-            except Exception as inner_e:
-                logging.error(f"Error inserting row for User: {row['User']} on Platform: {row['Platform']}: {inner_e}")
-        logging.info("Data insertion completed successfully.")
+        with db_session(prepare=PREPARE_STATEMENTS) as conn:
+            apply_migrations(conn)
+            summary = insert_dataframe(conn, labelled_data)
+        logging.info(
+            f"Data insertion completed successfully: {summary['inserted']} new rows, "
+            f"{summary['duplicates']} duplicates, {summary['words']} words."
+        )
     except Exception as e:
         logging.error(f"Error during data insertion: {e}")
         exit()
     finally:
-        close_connection(conn)
-        logging.info("Database connection closed.")
+        close_pool()
+        logging.info("Database connection pool closed.")
 
     logging.info("Program finished successfully.")
@@ -1,40 +1,53 @@
-import os
-import pandas as pd
 import logging
-from utils.scrapping_twitter import scrape_twitter
-from utils.sentiment_labeller import label_sentiment
-from datetime import datetime, timedelta
-from utils.scrapping_threads import save_to_csv, scrape_threads_search
-from utils.normalize import convert_column_to_integer, convert_column_to_string
-from db.db_operations import connect_db, insert_data, close_connection
-
-logging.basicConfig(
-    filename='data_pipeline.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+from typing import Optional
+from utils.artifact_store import write_artifact, default_run_date
+
+SEARCH_TERM = "pendidikan indonesia"
+
+
+def scrape_threads_stage(search_term: str = SEARCH_TERM, max_posts: int = 1000, days_back: int = 1,
+                         run_date: Optional[str] = None) -> dict:
+    """
+    Stage scraping Threads: hasil scraping ditulis ke artifact 'scraped'.
+
+    Parameters:
+    - search_term (str): Kata kunci pencarian.
+    - max_posts (int): Jumlah postingan maksimum.
+    - days_back (int): Rentang hari ke belakang.
+    - run_date (str, optional): Tanggal run (YYYY-MM-DD); default `default_run_date()`.
+
+    Returns:
+    - dict: Referensi artifact {'dataset', 'run_date', 'platform', 'path', 'rows'}.
+    """
+    from utils.scrapping_threads import save_to_csv, scrape_threads_search
+
+    run_date = run_date or default_run_date()
+    logging.info("Loading Threads data...")
+    posts = scrape_threads_search(
+        search_term=search_term,
+        max_posts=max_posts,
+        days_back=days_back
+    )
+    thread_data = save_to_csv(posts, search_term)
+    if thread_data is None:
+        raise ValueError("No Threads posts collected")
+    path = write_artifact(thread_data, 'scraped', run_date=run_date)
+    logging.info("Threads data loaded successfully.")
+    return {'dataset': 'scraped', 'run_date': run_date, 'platform': 'threads', 'path': path, 'rows': len(thread_data)}
+
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        filename='data_pipeline.log',
+        filemode='a',
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
     logging.info("Starting data pipeline process.")
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Path ke model
-    model_path = os.path.join(current_dir, "../models/indobert_2024-11-19_14-31-19")
 
     # Load data Thread
     try:
-        logging.info("Loading Threads data...")
-        search_term = "pendidikan indonesia"
-        days_back = 1
-        posts = scrape_threads_search(
-            search_term=search_term,
-            max_posts=1000,
-            days_back=days_back
-        )
-        thread_data = save_to_csv(posts, search_term)
-        thread_data.to_csv(os.path.join(current_dir, "../thread_data.csv"), index=False)
-        logging.info("Threads data loaded successfully.")
+        scrape_threads_stage()
         print('===================================================================================================')
         # print(thread_data.isna().sum())
         print('===================================================================================================')
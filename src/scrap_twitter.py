@@ -1,37 +1,47 @@
-import os
-import pandas as pd
 import logging
-from utils.scrapping_twitter import scrape_twitter
-from utils.sentiment_labeller import label_sentiment
-from datetime import datetime, timedelta
-from utils.scrapping_threads import save_to_csv, scrape_threads_search
-from utils.normalize import convert_column_to_integer, convert_column_to_string
-from db.db_operations import connect_db, insert_data, close_connection
-
-logging.basicConfig(
-    filename='data_pipeline.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+from typing import Optional
+from utils.artifact_store import write_artifact, default_run_date
+
+SEARCH_TERM = "pendidikan indonesia"
+
+
+def scrape_twitter_stage(search_term: str = SEARCH_TERM, run_date: Optional[str] = None) -> dict:
+    """
+    Stage scraping Twitter: hasil scraping ditulis ke artifact 'scraped'.
+
+    Parameters:
+    - search_term (str): Kata kunci pencarian.
+    - run_date (str, optional): Tanggal run (YYYY-MM-DD); default `default_run_date()`.
+
+    Returns:
+    - dict: Referensi artifact {'dataset', 'run_date', 'platform', 'path', 'rows'}.
+    """
+    from utils.scrapping_twitter import scrape_twitter
+
+    run_date = run_date or default_run_date()
+    logging.info("Loading Twitter data...")
+    twitter_data = scrape_twitter(search_term)
+    twitter_data.drop_duplicates(inplace=True)
+    path = write_artifact(twitter_data, 'scraped', run_date=run_date)
+    logging.info("Twitter data loaded successfully.")
+    return {'dataset': 'scraped', 'run_date': run_date, 'platform': 'twitter', 'path': path, 'rows': len(twitter_data)}
+
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        filename='data_pipeline.log',
+        filemode='a',
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
     logging.info("Starting data pipeline process.")
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Path ke model
-    model_path = os.path.join(current_dir, "../models/indobert_2024-11-19_14-31-19")
 
     # Load data Twitter
     try:
-        logging.info("Loading Twitter data...")
-        twitter_data = scrape_twitter("pendidikan indonesia")
-        twitter_data.drop_duplicates(inplace=True)
-        twitter_data.to_csv(os.path.join(current_dir, "../twitter_data.csv"), index=False)
-        logging.info("Twitter data loaded successfully.")
+        scrape_twitter_stage()
         print('===================================================================================================')
         # print(twitter_data.isna().sum())
         print('===================================================================================================')
     except Exception as e:
         logging.error(f"Error loading Twitter data: {e}")
-        exit()
\ No newline at end of file
+        exit()
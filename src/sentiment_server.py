@@ -0,0 +1,23 @@
+import os
+import logging
+from utils.sentiment_worker import serve
+
+# Configure logging
+logging.basicConfig(
+    filename='data_pipeline.log',
+    filemode='a',
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+
+if __name__ == "__main__":
+    logging.info("Starting sentiment worker.")
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # Path ke model
+    model_path = os.path.join(current_dir, "../models/indobert_2024-11-19_14-31-19")
+    try:
+        serve(model_path, backend=os.getenv('SENTIMENT_BACKEND', 'torch'))
+    except Exception as e:
+        logging.error(f"Sentiment worker stopped: {e}")
+        exit()
@@ -1,93 +1,261 @@
 import os
+import numpy as np
 import pandas as pd
 import logging
-from utils.scrapping_twitter import scrape_twitter
-from utils.sentiment_labeller import label_sentiment
-from datetime import datetime, timedelta
-from utils.scrapping_threads import save_to_csv, scrape_threads_search
-from utils.normalize import convert_column_to_integer, convert_column_to_string
-from db.db_operations import connect_db, insert_data, close_connection
-
-# Configure logging
-logging.basicConfig(
-    filename='data_pipeline.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+from typing import Optional
+from datetime import datetime
+from utils.sentiment_worker import label_sentiment_via_worker
+from utils.sentiment_cascade import label_sentiment_cascade
+from utils.cleaning import clean_frame
+from utils.artifact_store import DATASETS, read_artifact, write_artifact, iter_artifact_batches, artifact_path, default_run_date
+from utils.watermark import load_watermarks, save_watermarks, filter_new_rows, max_watermark
+from utils.seen_index import load_seen_index, save_seen_index, filter_unseen
 
-if __name__ == "__main__":
-    logging.info("Starting data pipeline process.")
-    current_dir = os.path.dirname(os.path.abspath(__file__))
+current_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Path ke model
-    model_path = os.path.join(current_dir, "../models/indobert_2024-11-19_14-31-19")
-    twitter_data_path = os.path.join(current_dir, "../twitter_data.csv")
-    thread_data_path = os.path.join(current_dir, "../thread_data.csv")
-    # Load data Twitter
-    try:
-        logging.info("Loading Twitter data...")
-        twitter_data = pd.read_csv(twitter_data_path)
-        logging.info("Twitter data loaded successfully.")
-        print('===================================================================================================')
-        # print(twitter_data.isna().sum())
-        print('===================================================================================================')
-    except Exception as e:
-        logging.error(f"Error loading Twitter data: {e}")
-        exit()
+# Path ke model
+MODEL_PATH = os.path.join(current_dir, "../models/indobert_2024-11-19_14-31-19")
+SENTIMENT_CACHE_PATH = os.path.join(current_dir, "../sentiment_cache.sqlite")
 
-    # Load data Thread
-    try:
-        logging.info("Loading Threads data...")
-        thread_data = pd.read_csv(thread_data_path)
-        logging.info("Threads data loaded successfully.")
-        print('===================================================================================================')
-        # print(thread_data.isna().sum())
-        print('===================================================================================================')
-    except Exception as e:
-        logging.error(f"Error loading Threads data: {e}")
-        exit()
 
-    # Combine Thread data
-    try:
-        logging.info("Combining Twitter and Threads data...")
+def combine_data(twitter_data=None, thread_data=None):
+    """
+    Menggabungkan data Twitter dan Threads ke kolom yang sama.
+
+    Parameters:
+    - twitter_data (pd.DataFrame, optional): Data hasil scraping Twitter.
+    - thread_data (pd.DataFrame, optional): Data hasil scraping Threads.
+
+    Returns:
+    - pd.DataFrame: Data gabungan.
+    """
+    frames = []
+    if twitter_data is not None and len(twitter_data):
+        twitter_data = twitter_data.copy()
+        twitter_data["Scraped At"] = datetime.now()
+        frames.append(twitter_data)
+    if thread_data is not None and len(thread_data):
+        thread_data = thread_data.copy()
         thread_data['Views'] = None
         thread_data["Status ID"] = None
-        twitter_data["Scraped At"] = datetime.now()
-        combined_data = pd.concat([twitter_data, thread_data], ignore_index=True)
-        combined_data.to_csv(os.path.join(current_dir, "../combined_data.csv"), index=False)
-        logging.info("Data combined successfully.")
-    except Exception as e:
-        logging.error(f"Error combining data: {e}")
-        exit()
+        frames.append(thread_data)
+    return pd.concat(frames, ignore_index=True)
 
-    # Proses sentimen
+
+def read_scraped(run_date, platform):
+    """
+    Membaca artifact 'scraped' satu platform. Platform tanpa artifact untuk
+    run_date (misalnya hanya Twitter yang di-scrape) menjadi frame kosong,
+    sama seperti pada mode streaming.
+
+    Parameters:
+    - run_date (str): Tanggal run artifact.
+    - platform (str): 'twitter' atau 'threads'.
+
+    Returns:
+    - pd.DataFrame: Data hasil scraping; kosong jika belum ada.
+    """
     try:
-        logging.info("Starting sentiment labelling...")
-        labelled_data = label_sentiment(combined_data, model_path)
-        labelled_data = combined_data
-        # labelled_data['Sentiment'] = labelled_data['Likes'].apply(lambda x: 'Positive' if x > 100 else 'Negative')
-        logging.info("Sentiment labelling completed successfully.")
-        ('===================================================================================================')
-        print(labelled_data.sample(5))
-        print('===================================================================================================')
-    except Exception as e:
-        logging.error(f"Error during sentiment labelling: {e}")
-        exit()
+        return read_artifact('scraped', run_date=run_date, platform=platform)
+    except FileNotFoundError:
+        logging.info(f"No scraped {platform} data for run_date={run_date}.")
+        return DATASETS['scraped'].empty_table().to_pandas()
+
+
+def label_data(df, model_path, sentiment_cache_path):
+    """
+    Melabeli sentimen lewat worker (atau in-process), dengan cascade leksikon
+    jika SENTIMENT_CASCADE_THRESHOLD di-set. Embedding setiap teks yang
+    diproses IndoBERT disimpan ke SENTIMENT_EMBEDDING_STORE jika di-set.
+
+    Parameters:
+    - df (pd.DataFrame): Data gabungan dengan kolom 'Text'.
+    - model_path (str): Path ke model lokal.
+    - sentiment_cache_path (str): Path cache sentimen SQLite.
+
+    Returns:
+    - pd.DataFrame: Data dengan kolom 'Sentiment'.
+    """
+    sentiment_options = {
+        'cache_path': sentiment_cache_path,
+        'num_workers': int(os.getenv('SENTIMENT_NUM_WORKERS', '1')),
+        'backend': os.getenv('SENTIMENT_BACKEND', 'torch'),
+        'embedding_store_path': os.getenv('SENTIMENT_EMBEDDING_STORE') or None
+    }
+    cascade_threshold = os.getenv('SENTIMENT_CASCADE_THRESHOLD')
+    if cascade_threshold:
+        return label_sentiment_cascade(
+            df, model_path,
+            threshold=float(cascade_threshold),
+            label_fn=label_sentiment_via_worker,
+            **sentiment_options
+        )
+    return label_sentiment_via_worker(df, model_path, **sentiment_options)
+
+
+def clean_data(df):
+    """
+    Menormalkan angka engagement, Status ID, tanggal dan username sesuai
+    spesifikasi `utils.cleaning.CLEANED_COLUMNS`.
+
+    Parameters:
+    - df (pd.DataFrame): Data berlabel.
+
+    Returns:
+    - pd.DataFrame: Data bersih dengan tipe ringkas.
+    """
+    cleaned = clean_frame(df)
+    logging.info(
+        f"Cleaned {len(cleaned)} rows: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB -> "
+        f"{cleaned.memory_usage(deep=True).sum() / 1e6:.1f} MB"
+    )
+    return cleaned
+
+
+def transform_streaming(model_path, sentiment_cache_path, watermarks, chunk_size, run_date=None, seen_index=None):
+    """
+    Menjalankan combine -> label -> clean -> write per chunk berukuran tetap,
+    sehingga memori dibatasi oleh `chunk_size` dan bukan oleh ukuran data.
+    Output setiap chunk langsung di-append ke artifact 'combined' dan 'cleaned'.
+
+    Post yang sudah ada di index seen-post dibuang sebelum pelabelan, dan
+    index disimpan setelah setiap chunk tertulis, sehingga duplikat antar-chunk
+    maupun antar-run tidak dilabeli ulang.
+
+    Parameters:
+    - model_path (str): Path ke model lokal.
+    - sentiment_cache_path (str): Path cache sentimen SQLite.
+    - watermarks (dict): Watermark per platform dari run sebelumnya.
+    - chunk_size (int): Jumlah baris maksimum per chunk.
+    - run_date (str, optional): Tanggal run artifact.
+    - seen_index (np.ndarray, optional): Index seen-post; default dibaca dari disk.
+
+    Returns:
+    - tuple: (watermark baru per platform, jumlah baris yang diproses).
+    """
+    if seen_index is None:
+        seen_index = load_seen_index()
+    marks = {platform: watermarks.get(platform) for platform in ('twitter', 'threads')}
+    total_rows = 0
+    chunk_number = 0
+    for platform in ('twitter', 'threads'):
+        for chunk in iter_artifact_batches('scraped', run_date=run_date, platform=platform, batch_size=chunk_size):
+            chunk, mark = filter_new_rows(chunk, platform, watermarks.get(platform))
+            marks[platform] = max_watermark(platform, marks[platform], mark)
+            chunk, keys = filter_unseen(chunk, seen_index)
+            if chunk.empty:
+                continue
+
+            chunk_number += 1
+            if platform == 'twitter':
+                combined_chunk = combine_data(twitter_data=chunk)
+            else:
+                combined_chunk = combine_data(thread_data=chunk)
+            cleaned_chunk = clean_data(label_data(combined_chunk, model_path, sentiment_cache_path))
+            # 'combined' baru ditulis setelah pelabelan berhasil agar chunk yang diulang tidak ter-append dua kali
+            write_artifact(combined_chunk, 'combined', run_date=run_date, append=True)
+            write_artifact(cleaned_chunk, 'cleaned', run_date=run_date, append=True)
+            seen_index = save_seen_index(seen_index, keys)
+
+            total_rows += len(cleaned_chunk)
+            logging.info(f"Chunk {chunk_number} ({platform}): {len(cleaned_chunk)} rows written, {total_rows} rows total.")
+    return marks, total_rows
+
+
+def transform_stage(run_date: Optional[str] = None, model_path: str = MODEL_PATH,
+                    sentiment_cache_path: str = SENTIMENT_CACHE_PATH, chunk_size: Optional[int] = None) -> dict:
+    """
+    Stage transform: membaca artifact 'scraped', memproses baris yang melewati
+    watermark, lalu meng-append hasilnya ke artifact 'combined' dan 'cleaned'.
+
+    Parameters:
+    - run_date (str, optional): Tanggal run (YYYY-MM-DD); default `default_run_date()`.
+    - model_path (str): Path ke model lokal.
+    - sentiment_cache_path (str): Path cache sentimen SQLite.
+    - chunk_size (int, optional): Jika > 0, jalankan mode streaming per chunk;
+      default dari env TRANSFORM_CHUNK_SIZE.
+
+    Returns:
+    - dict: Referensi artifact {'dataset', 'run_date', 'path', 'rows'}.
+    """
+    run_date = run_date or default_run_date()
+    if chunk_size is None:
+        chunk_size = int(os.getenv('TRANSFORM_CHUNK_SIZE', '0'))
+    watermarks = load_watermarks()
+    reference = {'dataset': 'cleaned', 'run_date': run_date, 'path': None, 'rows': 0}
+
+    # Mode streaming: memproses data per chunk
+    if chunk_size > 0:
+        logging.info(f"Starting streaming transform with chunks of {chunk_size} rows...")
+        marks, total_rows = transform_streaming(model_path, sentiment_cache_path, watermarks, chunk_size, run_date)
+        save_watermarks({**watermarks, **marks})
+        logging.info(f"Streaming transform completed: {total_rows} rows.")
+        if total_rows:
+            reference.update(path=artifact_path('cleaned', run_date), rows=total_rows)
+        return reference
+
+    # Load data Twitter dan Threads
+    logging.info("Loading Twitter data...")
+    twitter_data = read_scraped(run_date, 'twitter')
+    logging.info("Twitter data loaded successfully.")
+    logging.info("Loading Threads data...")
+    thread_data = read_scraped(run_date, 'threads')
+    logging.info("Threads data loaded successfully.")
+
+    # Hanya proses baris yang melewati watermark run sebelumnya
+    twitter_data, twitter_mark = filter_new_rows(twitter_data, 'twitter', watermarks.get('twitter'))
+    thread_data, thread_mark = filter_new_rows(thread_data, 'threads', watermarks.get('threads'))
+    logging.info(f"New rows past watermark: {len(twitter_data)} Twitter, {len(thread_data)} Threads.")
+
+    # Buang post yang sudah diproses run sebelumnya sebelum inferensi sentimen
+    seen_index = load_seen_index()
+    twitter_data, twitter_keys = filter_unseen(twitter_data, seen_index)
+    thread_data, thread_keys = filter_unseen(thread_data, seen_index)
+    logging.info(f"Posts not seen before: {len(twitter_data)} Twitter, {len(thread_data)} Threads.")
+    if twitter_data.empty and thread_data.empty:
+        logging.info("No new rows to transform.")
+        save_watermarks({**watermarks, 'twitter': twitter_mark, 'threads': thread_mark})
+        return reference
+
+    # Combine Thread data
+    logging.info("Combining Twitter and Threads data...")
+    combined_data = combine_data(twitter_data, thread_data)
+    logging.info("Data combined successfully.")
+
+    # Proses sentimen
+    logging.info("Starting sentiment labelling...")
+    labelled_data = label_data(combined_data, model_path, sentiment_cache_path)
+    logging.info("Sentiment labelling completed successfully.")
 
     # Data Cleaning
+    logging.info("Starting data cleaning...")
+    labelled_data = clean_data(labelled_data)
+    # 'combined' baru ditulis setelah pelabelan berhasil agar run yang diulang tidak ter-append dua kali
+    write_artifact(combined_data, 'combined', run_date=run_date, append=True)
+    path = write_artifact(labelled_data, 'cleaned', run_date=run_date, append=True)
+    logging.info("Data cleaning completed successfully.")
+    # Watermark baru disimpan setelah output tertulis agar run gagal diulang
+    save_watermarks({**watermarks, 'twitter': twitter_mark, 'threads': thread_mark})
+    save_seen_index(seen_index, np.concatenate([twitter_keys, thread_keys]))
+
+    reference.update(path=path, rows=len(labelled_data))
+    return reference
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename='data_pipeline.log',
+        filemode='a',
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    logging.info("Starting data pipeline process.")
+
     try:
-        logging.info("Starting data cleaning...")
-        labelled_data = convert_column_to_integer(labelled_data, "Likes")
-        labelled_data = convert_column_to_integer(labelled_data, "Views")
-        labelled_data = convert_column_to_integer(labelled_data, 'Replies')
-        labelled_data = convert_column_to_integer(labelled_data, 'Reposts')
-        labelled_data = convert_column_to_string(labelled_data, 'Status ID')
-        labelled_data['Date'] = pd.to_datetime(labelled_data['Date'], errors='coerce', utc=True)
-        labelled_data.drop_duplicates(inplace=True)
-        labelled_data['User'] = labelled_data['User'].str.replace(r'^@+', '', regex=True)
-        labelled_data.to_csv(os.path.join(current_dir, "../cleaned_data.csv"), index=False)
-        logging.info("Data cleaning completed successfully.")
+        result = transform_stage()
+        print('===================================================================================================')
+        print(f"{result['rows']} rows written to {result['path']}")
+        print('===================================================================================================')
     except Exception as e:
-        logging.error(f"Error during data cleaning: {e}")
+        logging.error(f"Error during transform: {e}")
         exit()
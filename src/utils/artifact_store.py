@@ -0,0 +1,216 @@
+import os
+import glob
+import uuid
+import shutil
+import logging
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_ROOT = os.getenv(
+    'ARTIFACT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../artifacts")
+)
+COMPRESSION = 'zstd'
+
+# Kolom hasil scraping disimpan apa adanya (angka engagement masih berupa
+# teks seperti '1.2K'); hanya tanggal yang diparse.
+RAW_SCHEMA = pa.schema([
+    ('Text', pa.string()),
+    ('User', pa.string()),
+    ('Likes', pa.string()),
+    ('Reposts', pa.string()),
+    ('Views', pa.string()),
+    ('Replies', pa.string()),
+    ('Status ID', pa.string()),
+    ('Date', pa.timestamp('us', tz='UTC')),
+    ('Scraped At', pa.timestamp('us')),
+    ('Platform', pa.string()),
+])
+CLEANED_SCHEMA = pa.schema([
+    ('Text', pa.string()),
+    ('User', pa.string()),
+    ('Likes', pa.int64()),
+    ('Reposts', pa.int64()),
+    ('Views', pa.int64()),
+    ('Replies', pa.int64()),
+    ('Status ID', pa.string()),
+    ('Date', pa.timestamp('us', tz='UTC')),
+    ('Scraped At', pa.timestamp('us')),
+    ('Platform', pa.string()),
+    ('Sentiment', pa.string()),
+])
+
+# Dataset antar-stage: scraped (scrap_*.py) -> combined -> cleaned (transform.py) -> load.py
+DATASETS = {
+    'scraped': RAW_SCHEMA,
+    'combined': RAW_SCHEMA,
+    'cleaned': CLEANED_SCHEMA,
+}
+
+
+def default_run_date():
+    """Tanggal run dari env PIPELINE_RUN_DATE (YYYY-MM-DD), default hari ini."""
+    return os.getenv('PIPELINE_RUN_DATE') or date.today().isoformat()
+
+
+def _partition_dir(dataset, run_date, platform=None, root=None):
+    path = os.path.join(root or ARTIFACT_ROOT, dataset, f"run_date={run_date}")
+    if platform is not None:
+        path = os.path.join(path, f"platform={str(platform).lower()}")
+    return path
+
+
+def artifact_path(dataset, run_date=None, root=None):
+    """
+    Referensi artifact: direktori run_date sebuah dataset.
+
+    Parameters:
+    - dataset (str): Nama dataset.
+    - run_date (str, optional): Tanggal run; default `default_run_date()`.
+    - root (str, optional): Direktori root store.
+
+    Returns:
+    - str: Path direktori.
+    """
+    return _partition_dir(dataset, run_date or default_run_date(), root=root)
+
+
+def conform(df, schema):
+    """
+    Menyesuaikan DataFrame dengan skema eksplisit: kolom yang hilang diisi
+    null, kolom di luar skema dibuang, dan setiap kolom dikonversi ke tipenya.
+
+    Parameters:
+    - df (pd.DataFrame): Data yang akan disesuaikan.
+    - schema (pa.Schema): Skema tujuan.
+
+    Returns:
+    - pa.Table: Tabel Arrow dengan skema `schema`.
+    """
+    columns = {}
+    for field in schema:
+        values = df[field.name] if field.name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if pa.types.is_string(field.type):
+            values = values.astype(object)
+            values = values.where(values.isna(), values.astype(str)).where(values.notna(), None)
+        elif pa.types.is_integer(field.type):
+            values = pd.to_numeric(values, errors='coerce').astype('Int64')
+        elif pa.types.is_timestamp(field.type):
+            values = pd.to_datetime(values, errors='coerce', utc=field.type.tz is not None, format='mixed')
+            if field.type.tz is None and getattr(values.dt, 'tz', None) is not None:
+                values = values.dt.tz_convert(None)
+        columns[field.name] = pa.array(values, type=field.type, from_pandas=True)
+    return pa.table(columns, schema=schema)
+
+
+def write_artifact(df, dataset, run_date=None, append=False, root=None):
+    """
+    Menulis DataFrame ke store sebagai Parquet terkompresi, dipartisi per
+    tanggal run dan platform:
+    `<root>/<dataset>/run_date=YYYY-MM-DD/platform=<platform>/part-*.parquet`.
+
+    Parameters:
+    - df (pd.DataFrame): Data yang akan ditulis; harus punya kolom 'Platform'.
+    - dataset (str): Nama dataset di `DATASETS`.
+    - run_date (str, optional): Tanggal run; default `default_run_date()`.
+    - append (bool): Jika False, partisi platform yang ditulis dikosongkan
+      terlebih dahulu; jika True, file baru ditambahkan.
+    - root (str, optional): Direktori root store; default `ARTIFACT_ROOT`.
+
+    Returns:
+    - str: Referensi artifact (direktori run_date dataset).
+    """
+    schema = DATASETS[dataset]
+    run_date = run_date or default_run_date()
+    table = conform(df, schema)
+
+    platforms = df['Platform'].astype(object).fillna('unknown') if 'Platform' in df.columns else pd.Series('unknown', index=df.index)
+    for platform in platforms.str.lower().unique():
+        part_dir = _partition_dir(dataset, run_date, platform, root)
+        if not append and os.path.isdir(part_dir):
+            shutil.rmtree(part_dir)
+        os.makedirs(part_dir, exist_ok=True)
+        mask = pa.array((platforms.str.lower() == platform).to_numpy())
+        pq.write_table(
+            table.filter(mask),
+            os.path.join(part_dir, f"part-{uuid.uuid4().hex}.parquet"),
+            compression=COMPRESSION
+        )
+
+    reference = artifact_path(dataset, run_date, root)
+    logger.info(f"Wrote {len(df)} rows to artifact {reference}")
+    return reference
+
+
+def artifact_files(dataset, run_date=None, platform=None, root=None):
+    """
+    Daftar file Parquet sebuah dataset.
+
+    Parameters:
+    - dataset (str): Nama dataset.
+    - run_date (str, optional): Tanggal run; default `default_run_date()`.
+      Gunakan '*' untuk semua tanggal.
+    - platform (str, optional): Filter platform; default semua platform.
+    - root (str, optional): Direktori root store.
+
+    Returns:
+    - list[str]: Path file, terurut.
+    """
+    run_date = run_date or default_run_date()
+    pattern = os.path.join(_partition_dir(dataset, run_date, platform or '*', root), "*.parquet")
+    return sorted(glob.glob(pattern))
+
+
+def _to_pandas(table):
+    # Integer nullable agar nilai kosong tidak mengubah kolom menjadi float
+    return table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+
+def read_artifact(dataset, run_date=None, platform=None, columns=None, root=None):
+    """
+    Membaca dataset dari store dengan tipe sesuai skemanya.
+
+    Parameters:
+    - dataset (str): Nama dataset.
+    - run_date (str, optional): Tanggal run; default `default_run_date()`.
+    - platform (str, optional): Filter platform.
+    - columns (list[str], optional): Subset kolom yang dibaca.
+    - root (str, optional): Direktori root store.
+
+    Returns:
+    - pd.DataFrame: Data gabungan seluruh file.
+
+    Raises:
+    - FileNotFoundError: Jika belum ada file untuk filter yang diberikan.
+    """
+    schema = DATASETS[dataset]
+    files = artifact_files(dataset, run_date, platform, root)
+    if not files:
+        raise FileNotFoundError(f"No '{dataset}' artifact for run_date={run_date or default_run_date()}")
+    tables = [pq.read_table(path, columns=columns, schema=schema) for path in files]
+    return _to_pandas(pa.concat_tables(tables))
+
+
+def iter_artifact_batches(dataset, run_date=None, platform=None, batch_size=10000, columns=None, root=None):
+    """
+    Membaca dataset per batch tanpa memuat semua file sekaligus.
+
+    Parameters:
+    - dataset (str): Nama dataset.
+    - run_date (str, optional): Tanggal run.
+    - platform (str, optional): Filter platform.
+    - batch_size (int): Jumlah baris maksimum per batch.
+    - columns (list[str], optional): Subset kolom yang dibaca.
+    - root (str, optional): Direktori root store.
+
+    Yields:
+    - pd.DataFrame: Batch data dengan tipe sesuai skema.
+    """
+    for path in artifact_files(dataset, run_date, platform, root):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+            yield _to_pandas(pa.Table.from_batches([batch]))
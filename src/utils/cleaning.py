@@ -0,0 +1,105 @@
+import logging
+
+import pandas as pd
+
+from utils.normalize import parse_engagement_counts, compact_integer
+from utils.sentiment_labels import LABEL_MAPPING
+
+logger = logging.getLogger(__name__)
+
+STRING_DTYPE = pd.StringDtype('pyarrow')
+
+
+def strip_handle(values):
+    """Menghapus '@' di awal username."""
+    return values.astype(STRING_DTYPE).str.replace(r'^@+', '', regex=True)
+
+
+# Spesifikasi kolom data bersih. Setiap kolom:
+# - name: nama kolom
+# - type: 'string' (Arrow), 'integer' (nullable, di-downcast), 'datetime' atau 'category'
+# - parser (opsional): fungsi Series -> Series yang dijalankan sebelum konversi tipe
+# - nullable: jika False, nilai kosong diisi `default`
+# - timezone (datetime): 'UTC' untuk tanggal ber-timezone, None untuk waktu lokal naif
+# - categories (category, opsional): kategori tetap; nilai lain tetap ditambahkan sebagai kategori
+CLEANED_COLUMNS = [
+    {'name': 'Text', 'type': 'string', 'nullable': True},
+    {'name': 'User', 'type': 'string', 'parser': strip_handle, 'nullable': True},
+    {'name': 'Likes', 'type': 'integer', 'parser': parse_engagement_counts, 'nullable': False, 'default': 0},
+    {'name': 'Reposts', 'type': 'integer', 'parser': parse_engagement_counts, 'nullable': False, 'default': 0},
+    {'name': 'Views', 'type': 'integer', 'parser': parse_engagement_counts, 'nullable': False, 'default': 0},
+    {'name': 'Replies', 'type': 'integer', 'parser': parse_engagement_counts, 'nullable': False, 'default': 0},
+    {'name': 'Status ID', 'type': 'string', 'nullable': True},
+    {'name': 'Date', 'type': 'datetime', 'timezone': 'UTC', 'nullable': True},
+    {'name': 'Scraped At', 'type': 'datetime', 'timezone': None, 'nullable': True},
+    {'name': 'Platform', 'type': 'category', 'nullable': True},
+    {'name': 'Sentiment', 'type': 'category', 'categories': list(LABEL_MAPPING.values()), 'nullable': True},
+]
+
+
+def _to_string(values, column):
+    return values.astype(STRING_DTYPE)
+
+
+def _to_integer(values, column):
+    # Nilai teks seperti '1.2K' harus sudah diubah oleh parser kolom
+    return compact_integer(values)
+
+
+def _to_datetime(values, column):
+    utc = column.get('timezone') == 'UTC'
+    values = pd.to_datetime(values, errors='coerce', utc=utc, format='mixed')
+    if not utc and getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_convert(None)
+    return values
+
+
+def _to_category(values, column):
+    categories = list(column.get('categories') or [])
+    observed = pd.unique(values.dropna())
+    categories += sorted(str(value) for value in observed if str(value) not in categories)
+    return values.astype(object).where(values.notna(), None).astype(pd.CategoricalDtype(categories))
+
+
+CASTERS = {
+    'string': _to_string,
+    'integer': _to_integer,
+    'datetime': _to_datetime,
+    'category': _to_category,
+}
+
+
+def clean_frame(df, spec=CLEANED_COLUMNS, drop_duplicates=True):
+    """
+    Membersihkan DataFrame sesuai spesifikasi kolom dalam satu kali lintasan:
+    setiap kolom di-parse, dikonversi ke tipe ringkasnya dan diisi default
+    sekali saja, lalu frame baru disusun dari kolom-kolom tersebut. Kolom di
+    luar spesifikasi dibiarkan apa adanya.
+
+    Parameters:
+    - df (pd.DataFrame): Data berlabel.
+    - spec (list[dict]): Spesifikasi kolom; default `CLEANED_COLUMNS`.
+    - drop_duplicates (bool): Buang baris duplikat setelah pembersihan.
+
+    Returns:
+    - pd.DataFrame: Data bersih.
+
+    Raises:
+    - ValueError: Jika tipe kolom tidak dikenal.
+    """
+    columns = {name: df[name] for name in df.columns}
+    for column in spec:
+        name = column['name']
+        if column['type'] not in CASTERS:
+            raise ValueError(f"Unknown column type '{column['type']}' for '{name}'")
+        values = columns.get(name, pd.Series(None, index=df.index, dtype=object))
+        if column.get('parser'):
+            values = column['parser'](values)
+        if not column.get('nullable', True):
+            values = values.fillna(column['default'])
+        columns[name] = CASTERS[column['type']](values, column)
+
+    cleaned = pd.DataFrame(columns, index=df.index)
+    if drop_duplicates:
+        cleaned = cleaned.drop_duplicates()
+    return cleaned
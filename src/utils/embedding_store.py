@@ -0,0 +1,214 @@
+import os
+import sqlite3
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.sentiment_cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+# Batas jumlah parameter per query agar aman untuk SQLite
+_QUERY_CHUNK = 500
+
+
+class EmbeddingStore:
+    """
+    Penyimpanan embedding CLS (pooled) per teks dalam matriks float16
+    memory-mapped, diindeks oleh hash konten teks.
+
+    Struktur direktori:
+    - embeddings.f16: matriks (n_rows, dim) float16 yang hanya di-append.
+    - index.sqlite: mapping text_hash -> nomor baris dan metadata dimensi.
+    """
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.matrix_path = os.path.join(path, "embeddings.f16")
+
+        self.conn = sqlite3.connect(os.path.join(path, "index.sqlite"))
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_index (
+                text_hash TEXT PRIMARY KEY,
+                row INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM embedding_index").fetchone()[0]
+
+    def _matrix_rows(self):
+        if self.dim is None or not os.path.exists(self.matrix_path):
+            return 0
+        return os.path.getsize(self.matrix_path) // (self.dim * 2)
+
+    def lookup(self, hashes):
+        """
+        Mencari nomor baris untuk daftar hash teks.
+
+        Parameters:
+        - hashes (list[str]): Hash teks.
+
+        Returns:
+        - dict: Mapping hash -> nomor baris untuk hash yang tersimpan.
+        """
+        found = {}
+        for i in range(0, len(hashes), _QUERY_CHUNK):
+            chunk = hashes[i:i + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(self.conn.execute(
+                f"SELECT text_hash, row FROM embedding_index WHERE text_hash IN ({placeholders})",
+                chunk
+            ).fetchall())
+        return found
+
+    def add(self, hashes, embeddings):
+        """
+        Menambahkan embedding untuk hash yang belum tersimpan.
+
+        Parameters:
+        - hashes (list[str]): Hash teks, sejajar dengan baris `embeddings`.
+        - embeddings (np.ndarray): Matriks (n, dim).
+
+        Returns:
+        - int: Jumlah embedding baru yang ditulis.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float16)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match store dimension {self.dim}")
+
+        existing = self.lookup(list(dict.fromkeys(hashes)))
+        positions = {}
+        for pos, h in enumerate(hashes):
+            if h not in existing and h not in positions:
+                positions[h] = pos
+        if not positions:
+            return 0
+
+        # Nomor baris dihitung dari ukuran file agar tetap benar walau ada
+        # baris yatim dari penulisan sebelumnya yang gagal sebelum commit.
+        # Sisa baris yang terpotong (penulisan terputus di tengah baris)
+        # dibuang dulu agar baris baru tetap sejajar dengan nomor barisnya.
+        start = self._matrix_rows()
+        with open(self.matrix_path, 'ab') as f:
+            f.truncate(start * self.dim * 2)
+            f.write(embeddings[list(positions.values())].tobytes())
+        self.conn.executemany(
+            "INSERT INTO embedding_index (text_hash, row) VALUES (?, ?)",
+            [(h, start + i) for i, h in enumerate(positions)]
+        )
+        self.conn.commit()
+        return len(positions)
+
+    def matrix(self):
+        """Matriks embedding read-only (memory-mapped)."""
+        rows = self._matrix_rows()
+        if rows == 0:
+            return np.zeros((0, self.dim or 0), dtype=np.float16)
+        return np.memmap(self.matrix_path, dtype=np.float16, mode='r', shape=(rows, self.dim))
+
+    def rescore(self, weight, bias, label_mapping, chunk_rows=65536):
+        """
+        Menghitung ulang label seluruh riwayat dengan head klasifikasi baru.
+
+        Parameters:
+        - weight (np.ndarray): Bobot head (n_labels, dim).
+        - bias (np.ndarray): Bias head (n_labels,).
+        - label_mapping (dict): Mapping indeks kelas -> label.
+        - chunk_rows (int): Jumlah baris per matmul agar memori tetap terbatas.
+
+        Returns:
+        - pd.DataFrame: Kolom 'text_hash' dan 'Sentiment'.
+        """
+        matrix = self.matrix()
+        weight_t = np.asarray(weight, dtype=np.float32).T
+        bias = np.asarray(bias, dtype=np.float32)
+
+        classes = np.empty(len(matrix), dtype=np.int64)
+        for start in range(0, len(matrix), chunk_rows):
+            block = np.asarray(matrix[start:start + chunk_rows], dtype=np.float32)
+            classes[start:start + len(block)] = np.argmax(block @ weight_t + bias, axis=1)
+
+        index = pd.read_sql_query("SELECT text_hash, row FROM embedding_index ORDER BY row", self.conn)
+        labels = pd.Series(classes[index['row'].to_numpy()]).map(label_mapping)
+        return pd.DataFrame({'text_hash': index['text_hash'], 'Sentiment': labels.to_numpy()})
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_classifier_head(model_path):
+    """
+    Mengambil bobot dan bias head klasifikasi dari checkpoint.
+
+    Parameters:
+    - model_path (str): Path ke checkpoint (misalnya hasil retrain head).
+
+    Returns:
+    - tuple: (weight, bias) sebagai np.ndarray float32.
+    """
+    from transformers import AutoModelForSequenceClassification
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    classifier = getattr(model, "classifier", None)
+    if classifier is None or not hasattr(classifier, "weight"):
+        raise ValueError(f"Model at {model_path} has no linear 'classifier' head")
+    return (
+        classifier.weight.detach().float().numpy(),
+        classifier.bias.detach().float().numpy()
+    )
+
+
+def rescore_history(store_path, model_path, df=None, text_column="Text"):
+    """
+    Melabeli ulang seluruh riwayat hanya dengan head klasifikasi dari
+    `model_path`, tanpa menjalankan encoder BERT.
+
+    Parameters:
+    - store_path (str): Direktori EmbeddingStore.
+    - model_path (str): Checkpoint yang berisi head klasifikasi baru.
+    - df (pd.DataFrame, optional): Jika diisi, kolom 'Sentiment' pada baris
+      yang embedding-nya tersimpan diperbarui dengan label baru.
+    - text_column (str): Nama kolom teks pada `df`.
+
+    Returns:
+    - pd.DataFrame: `df` yang diperbarui, atau tabel 'text_hash'/'Sentiment'
+      jika `df` tidak diberikan.
+    """
+    from utils.sentiment_labels import LABEL_MAPPING
+
+    weight, bias = load_classifier_head(model_path)
+    with EmbeddingStore(store_path) as store:
+        rescored = store.rescore(weight, bias, LABEL_MAPPING)
+    logger.info(f"Rescored {len(rescored)} stored embeddings with head from {model_path}")
+
+    if df is None:
+        return rescored
+
+    new_labels = df[text_column].map(text_hash).map(rescored.set_index('text_hash')['Sentiment'])
+    if 'Sentiment' in df.columns:
+        df['Sentiment'] = new_labels.fillna(df['Sentiment'])
+    else:
+        df['Sentiment'] = new_labels
+    return df
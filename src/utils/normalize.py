@@ -1,39 +1,126 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Suffix multipliers in English and Indonesian UI locales (lowercase keys).
+# 'm' stays "million" as on the English Twitter UI; Indonesian billions use 'mlr'.
+SUFFIX_MULTIPLIERS = {
+    '': 1,
+    'k': 1_000, 'rb': 1_000, 'ribu': 1_000,
+    'm': 1_000_000, 'jt': 1_000_000, 'juta': 1_000_000,
+    'b': 1_000_000_000, 'mlr': 1_000_000_000, 'miliar': 1_000_000_000,
+}
+# A single pattern with two alternatives, tried in order:
+# - 'grouped': digit groups of three with no suffix, read as thousands separators ('1.234', '12,345,678')
+# - 'integer', 'fraction' and 'suffix': a number with at most one separator, where ',' and '.' are both
+#   decimal marks, and an optional suffix ('14K', '3.1K', '1,2 rb', '3 jt', '1.234K')
+# Letters are matched as [a-zA-Z] instead of with re.IGNORECASE so pyarrow runs the pattern natively.
+ENGAGEMENT_PATTERN = (
+    r'^\s*(?:(?P<grouped>\d{1,3}(?:[.,]\d{3}){1,5})\.?\s*$'
+    r'|(?P<integer>\d{1,15})(?:[.,](?P<fraction>\d+))?\s*(?P<suffix>[a-zA-Z]*)\.?\s*$)'
+)
+ARROW_STRING = pd.ArrowDtype(pa.string())
+SUFFIXES = pa.array(list(SUFFIX_MULTIPLIERS))
+MULTIPLIERS = pa.array(list(SUFFIX_MULTIPLIERS.values()), type=pa.int64())
+# String columns whose first rows are mostly distinct are parsed directly instead of factorized first
+FACTORIZE_SAMPLE = 10_000
+
+
+def _parse_counts(texts):
+    """Parse a pyarrow string array of counts into an Int64 Series; unparsable values are <NA>."""
+    parts = pc.extract_regex(texts, ENGAGEMENT_PATTERN)
+    grouped, integer, fraction, suffix = (pc.struct_field(parts, name) for name in ('grouped', 'integer', 'fraction', 'suffix'))
+    multiplier = pc.take(MULTIPLIERS, pc.index_in(pc.utf8_lower(suffix), value_set=SUFFIXES))
+    # Exactly one of 'grouped' and 'integer' is non-empty, so joining them gives the integer part
+    grouped = pc.replace_substring(pc.replace_substring(grouped, '.', ''), ',', '')
+    integer = pc.cast(pc.binary_join_element_wise(grouped, integer, ''), pa.int64())
+
+    # Exact integer arithmetic instead of float, so '4.35K' is 4350 and not 4349;
+    # a leading '0' keeps an empty fraction parsable without changing its value
+    fraction = pc.utf8_slice_codeunits(fraction, 0, 9)
+    scale = pc.power(10, pc.cast(pc.utf8_length(fraction), pa.int64()))
+    fraction = pc.cast(pc.binary_join_element_wise('0', fraction, ''), pa.int64())
+    counts = pc.add(pc.multiply(integer, multiplier), pc.divide(pc.multiply(fraction, multiplier), scale))
+    return counts.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+
+def compact_integer(values):
+    """
+    Downcast an integer Series to the smallest nullable signed integer dtype that fits.
+
+    Parameters:
+    - values (pd.Series): Integer values, possibly with missing values.
+
+    Returns:
+    - pd.Series: The values as Int8, Int16, Int32 or Int64.
+    """
+    values = values.astype('Int64')
+    low, high = values.min(), values.max()
+    for dtype in ('Int8', 'Int16', 'Int32'):
+        info = np.iinfo(dtype.lower())
+        if pd.isna(low) or (low >= info.min and high <= info.max):
+            return values.astype(dtype)
+    return values
+
+
+def parse_engagement_counts(values):
+    """
+    Parse engagement counts such as '14K', '3.1K', '2M', '1,2 rb', '3 jt' or '1.234' into integers.
+
+    Each value goes through a single pyarrow regex extract. Columns with repeated
+    values are factorized first, so each distinct string is parsed once; string
+    columns whose first rows are mostly distinct are parsed directly. Numbers in
+    object columns are formatted as text and go through the same parser. Without a
+    suffix, digit groups of three ('1.234', '1,234') are thousands separators;
+    otherwise ',' and '.' are both decimal marks. Fractions are truncated.
+
+    Parameters:
+    - values (pd.Series): Raw counts as strings and/or numbers.
+
+    Returns:
+    - pd.Series: Counts in a compact nullable integer dtype; missing or unparsable values are <NA>.
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        return compact_integer(np.trunc(values.astype('Float64')).astype('Int64'))
+    if isinstance(values.dtype, (pd.StringDtype, pd.ArrowDtype)) or pd.api.types.infer_dtype(values) in ('string', 'empty'):
+        values = values.astype(ARROW_STRING)
+        if values.iloc[:FACTORIZE_SAMPLE].nunique() > min(len(values), FACTORIZE_SAMPLE) // 2:
+            parsed = compact_integer(_parse_counts(pa.array(values)))
+            return pd.Series(parsed.array, index=values.index, name=values.name)
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        texts = pa.array(uniques)
+    else:
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        uniques = pd.Series(uniques, dtype=object)
+        is_number = uniques.map(lambda value: isinstance(value, (int, float, np.number)) and not isinstance(value, bool))
+        # Numbers are formatted without exponent so they go through the same parser
+        texts = uniques.where(~is_number, uniques[is_number].map(lambda value: f"{value:f}"))
+        texts = pa.array(texts.astype(str).to_numpy(), type=pa.string())
+    # Values are a subset of the uniques, so their range decides the dtype; code -1 (missing) becomes <NA>
+    parsed = compact_integer(_parse_counts(texts))
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=values.index, name=values.name)
+
 
 def convert_column_to_integer(df, column_name):
     """
-    Convert a column with values like '14K', '3.1K', '2M', or NaN to integers.
+    Convert a column with values like '14K', '3.1K', '2M', '1,2 rb', '3 jt' or NaN to integers.
+
+    Missing and unparsable values become 0, as before; see `parse_engagement_counts`.
 
     Parameters:
     - df (pd.DataFrame): DataFrame containing the column to process.
     - column_name (str): Name of the column to convert.
 
     Returns:
-    - pd.DataFrame: The updated DataFrame with the column converted to integers.
+    - pd.DataFrame: The updated DataFrame with the column converted to a compact integer dtype.
     """
-    def convert_to_int(value):
-        """Helper function to convert a single value to integer."""
-        if pd.isna(value):  # Handle NaN values
-            return 0
-        if isinstance(value, str):
-            if value.endswith('K'):  # Handle 'K' suffix (thousands)
-                return int(float(value[:-1]) * 1000)
-            elif value.endswith('M'):  # Handle 'M' suffix (millions)
-                return int(float(value[:-1]) * 1000000)
-            elif value.replace('.', '', 1).isdigit():  # Handle pure numeric strings
-                return int(float(value))
-        elif isinstance(value, (int, float)):  # Handle numeric types
-            return int(value)
-        return 0  # Default fallback for unexpected values
-
     try:
         # Ensure the column exists
         if column_name not in df.columns:
             raise KeyError(f"Column '{column_name}' does not exist in the DataFrame.")
-        
-        # Apply conversion
-        df[column_name] = df[column_name].apply(convert_to_int)
+
+        df[column_name] = compact_integer(parse_engagement_counts(df[column_name]).fillna(0))
         print(f"Successfully converted '{column_name}' to integers.")
     except KeyError as ke:
         print(f"KeyError: {ke}")
@@ -1,4 +1,5 @@
 import os
+import json
 import time
 import logging
 import urllib.parse
@@ -17,6 +18,44 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+STATUS_PATTERN = re.compile(r"/status/(\d+)")
+# Mengembalikan outerHTML artikel tweet yang belum diambil, lalu menandainya
+NEW_ARTICLES_SCRIPT = """
+const articles = document.querySelectorAll('article[data-testid="tweet"]:not([data-scraped])');
+return Array.from(articles, (article) => {
+    article.setAttribute('data-scraped', '1');
+    return article.outerHTML;
+});
+"""
+# Mode 'js': field setiap artikel baru diambil di browser dan dikembalikan sebagai
+# JSON ringkas [text, handle, likes, reposts, views, datetime, status_id]
+EXTRACT_TWEETS_SCRIPT = """
+const count = (element) => {
+    const span = element && element.querySelector('span.css-1jxf684');
+    return span ? span.textContent : '0';
+};
+const articles = document.querySelectorAll('article[data-testid="tweet"]:not([data-scraped])');
+return JSON.stringify(Array.from(articles, (article) => {
+    article.setAttribute('data-scraped', '1');
+    const text = article.querySelector('div[data-testid="tweetText"]');
+    const user = article.querySelector('div[data-testid="User-Name"]');
+    const handle = user && Array.from(user.querySelectorAll('span')).find((span) =>
+        span.childNodes.length === 1 && span.firstChild.nodeType === Node.TEXT_NODE && span.textContent.includes('@'));
+    const time = article.querySelector('time');
+    const link = Array.from(article.querySelectorAll('a[href]')).find((a) => /\\/status\\/\\d+/.test(a.getAttribute('href')));
+    return [
+        text ? text.textContent : null,
+        handle ? handle.textContent : '',
+        count(article.querySelector('button[data-testid="like"]')),
+        count(article.querySelector('button[data-testid="retweet"]')),
+        count(article.querySelector('a[aria-label*="views"]')),
+        time ? time.getAttribute('datetime') : null,
+        link ? link.getAttribute('href').match(/\\/status\\/(\\d+)/)[1] : null,
+    ];
+}));
+"""
+EXTRACTION_MODES = ('js', 'html')
+
 def rename_columns(df, column_mapping):
     """
     Mengganti nama kolom pada DataFrame sesuai dengan mapping yang diberikan.
@@ -31,7 +70,121 @@ def rename_columns(df, column_mapping):
     logger.info("Renaming columns...")
     return df.rename(columns=column_mapping, inplace=False)
 
-def scrape_twitter(search_term, max_tweets=1000, max_scrolls=10):
+def parse_tweet_article(tweet):
+    """
+    Mengambil field sebuah tweet dari elemen <article data-testid="tweet">.
+
+    Parameters:
+    - tweet (bs4.element.Tag): Elemen artikel tweet.
+
+    Returns:
+    - dict: Field tweet dengan nama kolom mentah scraper.
+    """
+    def count(element):
+        span = element.find("span", {"class": "css-1jxf684"}) if element else None
+        return span.text if span else "0"
+
+    text_element = tweet.find("div", {"data-testid": "tweetText"})
+    user_element = tweet.find("div", {"data-testid": "User-Name"})
+    handle = user_element.find("span", string=lambda x: x and '@' in x) if user_element else None
+
+    # Extract post creation date
+    time_element = tweet.find("time")
+    created_at = format_created_at(time_element.get('datetime') if time_element else None)
+
+    # Extract status ID
+    status_link = tweet.find("a", href=STATUS_PATTERN)
+    status_id = STATUS_PATTERN.search(status_link['href']).group(1) if status_link else None
+
+    return {
+        "Tweet Text": text_element.get_text() if text_element else None,
+        "Username": handle.text if handle else "",
+        "Likes": count(tweet.find("button", {"data-testid": "like"})),
+        "Retweets": count(tweet.find("button", {"data-testid": "retweet"})),
+        "Views": count(tweet.find("a", {"aria-label": lambda x: x and 'views' in x})),
+        "Status ID": status_id,
+        "Created At": created_at,
+    }
+
+
+def format_created_at(value):
+    """Mengubah atribut time[datetime] ('2024-11-19T10:00:00.000Z') menjadi 'YYYY-MM-DD HH:MM:SS'."""
+    if value is None:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y-%m-%d %H:%M:%S")
+
+
+def extract_new_tweets(driver, extraction='js'):
+    """
+    Mengambil tweet dari artikel yang baru dirender dengan satu execute_script.
+
+    Mode 'js' mengambil field di browser dan hanya mengirim JSON ringkas;
+    mode 'html' mengirim outerHTML artikel lalu mem-parse-nya dengan BeautifulSoup.
+    Keduanya menghasilkan dict yang sama.
+
+    Parameters:
+    - driver (webdriver.Chrome): Driver Selenium.
+    - extraction (str): 'js' atau 'html'.
+
+    Returns:
+    - list[dict]: Tweet dengan nama kolom mentah scraper.
+    """
+    if extraction not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode '{extraction}', expected one of {EXTRACTION_MODES}")
+
+    tweets = []
+    if extraction == 'js':
+        for text, handle, likes, retweets, views, created_at, status_id in json.loads(driver.execute_script(EXTRACT_TWEETS_SCRIPT)):
+            try:
+                created_at = format_created_at(created_at)
+            except ValueError as e:
+                logger.error(f"Error parsing tweet: {str(e)}")
+                continue
+            tweets.append({
+                "Tweet Text": text,
+                "Username": handle,
+                "Likes": likes,
+                "Retweets": retweets,
+                "Views": views,
+                "Status ID": status_id,
+                "Created At": created_at,
+            })
+        return tweets
+
+    for html in driver.execute_script(NEW_ARTICLES_SCRIPT):
+        try:
+            tweets.append(parse_tweet_article(BeautifulSoup(html, 'html.parser').article))
+        except Exception as e:
+            logger.error(f"Error parsing tweet: {str(e)}")
+    return tweets
+
+
+def tweet_key(tweet):
+    """Kunci deduplikasi: Status ID, atau username + waktu + teks jika ID tidak ada."""
+    return tweet["Status ID"] or (tweet["Username"], tweet["Created At"], tweet["Tweet Text"])
+
+
+def scrape_twitter(search_term, max_tweets=1000, max_scrolls=10, max_idle_scrolls=1, extraction=None):
+    """
+    Scraping hasil pencarian Twitter/X.
+
+    Setiap scroll hanya memproses artikel yang baru dirender: artikel yang
+    sudah diambil ditandai di DOM dan tweet yang sudah terkumpul dilewati
+    berdasarkan Status ID, sehingga kerja per scroll tidak bertambah seiring
+    panjang halaman.
+
+    Parameters:
+    - search_term (str): Kata kunci pencarian.
+    - max_tweets (int): Jumlah tweet maksimum.
+    - max_scrolls (int): Jumlah scroll maksimum.
+    - max_idle_scrolls (int): Berhenti setelah sekian scroll berturut-turut tanpa tweet baru.
+    - extraction (str, optional): 'js' (field diambil di browser) atau 'html'
+      (BeautifulSoup); default env TWITTER_EXTRACTION atau 'js'.
+
+    Returns:
+    - pd.DataFrame: Tweet dengan kolom Text, User, Likes, Reposts, Views, Status ID, Date, Platform.
+    """
+    extraction = extraction or os.getenv('TWITTER_EXTRACTION', 'js')
     logger.info("Initializing Selenium WebDriver...")
     driver = webdriver.Chrome()
 
@@ -69,83 +222,35 @@ def scrape_twitter(search_term, max_tweets=1000, max_scrolls=10):
 
         # Initialize data collection
         data = []
+        seen_keys = set()
         scroll_count = 0
+        idle_scrolls = 0
         logger.info("Starting scraping process...")
 
         # Scraping loop
         while len(data) < max_tweets and scroll_count < max_scrolls:
             logger.info(f"Scroll attempt {scroll_count + 1}/{max_scrolls}. Collected {len(data)} tweets so far.")
-            
-            # Get page content
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-            # Parse tweets
-            for div in soup.find_all("div", {"class": "css-175oi2r"}):
-                tweets = div.find_all("article", {"data-testid": "tweet"})
-                
-                for tweet in tweets:
-                    if len(data) >= max_tweets:
-                        logger.info("Reached maximum number of tweets.")
-                        break
-
-                    try:
-                        # Extract tweet data
-                        tweet_text = tweet.find("div", {"data-testid": "tweetText"}).get_text() if tweet.find("div", {"data-testid": "tweetText"}) else None
-                        username = (
-                            tweet.find("div", {"data-testid": "User-Name"})
-                            .find("span", string=lambda x: x and '@' in x).text
-                            if tweet.find("div", {"data-testid": "User-Name"}) and tweet.find("div", {"data-testid": "User-Name"}).find("span", string=lambda x: x and '@' in x)
-                            else ""
-                        )
-                        retweets = (
-                            tweet.find("button", {"data-testid": "retweet"})
-                            .find("span", {"class": "css-1jxf684"}).text
-                            if tweet.find("button", {"data-testid": "retweet"})
-                            else "0"
-                        )
-                        likes = (
-                            tweet.find("button", {"data-testid": "like"})
-                            .find("span", {"class": "css-1jxf684"}).text
-                            if tweet.find("button", {"data-testid": "like"})
-                            else "0"
-                        )
-                        views = (
-                            tweet.find("a", {"aria-label": lambda x: x and 'views' in x})
-                            .find("span", {"class": "css-1jxf684"}).text
-                            if tweet.find("a", {"aria-label": lambda x: x and 'views' in x})
-                            else "0"
-                        )
-
-                        # Extract post creation date
-                        time_element = tweet.find("time")
-                        created_at = None
-                        if time_element and 'datetime' in time_element.attrs:
-                            created_at = datetime.strptime(
-                                time_element['datetime'], "%Y-%m-%dT%H:%M:%S.%fZ"
-                            ).strftime("%Y-%m-%d %H:%M:%S")
-
-                        # Extract status ID
-                        status_links = tweet.find_all("a", href=re.compile(r"/status/\d+"))
-                        status_id = None
-                        for link in status_links:
-                            match = re.search(r"/status/(\d+)", link['href'])
-                            if match:
-                                status_id = match.group(1)
-                                break
-
-                        # Store tweet data
-                        data.append({
-                            "Tweet Text": tweet_text,
-                            "Username": username,
-                            "Likes": likes,
-                            "Retweets": retweets,
-                            "Views": views,
-                            "Status ID": status_id,
-                            "Created At": created_at,
-                        })
-                    except Exception as e:
-                        logger.error(f"Error parsing tweet: {str(e)}")
-                        continue
+
+            # Hanya artikel yang baru dirender sejak scroll sebelumnya
+            new_tweets = 0
+            for tweet in extract_new_tweets(driver, extraction):
+                if len(data) >= max_tweets:
+                    logger.info("Reached maximum number of tweets.")
+                    break
+                key = tweet_key(tweet)
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                data.append(tweet)
+                new_tweets += 1
+
+            if new_tweets == 0:
+                idle_scrolls += 1
+                if idle_scrolls >= max_idle_scrolls:
+                    logger.info(f"No new tweets after {idle_scrolls} scroll(s), stopping.")
+                    break
+            else:
+                idle_scrolls = 0
 
             # Scroll down to load more tweets
             logger.info("Scrolling down...")
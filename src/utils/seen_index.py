@@ -0,0 +1,108 @@
+import os
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.artifact_store import ARTIFACT_ROOT
+
+logger = logging.getLogger(__name__)
+
+SEEN_INDEX_PATH = os.path.join(ARTIFACT_ROOT, "_state", "seen_posts.npy")
+
+
+def load_seen_index(path=SEEN_INDEX_PATH):
+    """
+    Membaca index post yang sudah pernah diproses.
+
+    Index berupa array uint64 terurut berisi hash 64-bit setiap post (8 byte
+    per post), sehingga pencarian cukup dengan binary search.
+
+    Parameters:
+    - path (str): Path file index (.npy).
+
+    Returns:
+    - np.ndarray: Hash terurut; kosong jika file belum ada.
+    """
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.uint64)
+    return np.load(path)
+
+
+def save_seen_index(index, new_keys, path=SEEN_INDEX_PATH):
+    """
+    Menggabungkan hash baru ke index dan menyimpannya secara atomik.
+
+    Parameters:
+    - index (np.ndarray): Index yang sudah ada.
+    - new_keys (np.ndarray): Hash post yang baru diproses.
+    - path (str): Path file index (.npy).
+
+    Returns:
+    - np.ndarray: Index gabungan.
+    """
+    merged = np.union1d(index, np.asarray(new_keys, dtype=np.uint64))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp.npy"
+    np.save(temp_path, merged)
+    os.replace(temp_path, path)
+    logger.info(f"Seen-post index: {len(merged)} posts ({merged.nbytes / 1e6:.1f} MB)")
+    return merged
+
+
+def _key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def post_keys(df):
+    """
+    Hash 64-bit setiap post hasil scraping.
+
+    Tweet dengan Status ID numerik dikenali dari ID-nya; post lain dari
+    platform, username (tanpa '@'), tanggal UTC dan teks.
+
+    Parameters:
+    - df (pd.DataFrame): Data hasil scraping satu atau beberapa platform.
+
+    Returns:
+    - np.ndarray: Hash uint64, satu per baris.
+    """
+    if df.empty:
+        return np.empty(0, dtype=np.uint64)
+    missing = pd.Series('', index=df.index)
+    platform = df['Platform'].astype(object).fillna('').astype(str).str.lower() if 'Platform' in df.columns else missing
+    user = df['User'].astype(object).fillna('').astype(str).str.lstrip('@') if 'User' in df.columns else missing
+    text = df['Text'].astype(object).fillna('').astype(str) if 'Text' in df.columns else missing
+    if 'Date' in df.columns:
+        date = pd.to_datetime(df['Date'], utc=True, errors='coerce', format='mixed').dt.strftime('%Y-%m-%dT%H:%M:%S').fillna('')
+    else:
+        date = missing
+    keys = platform + '\x1f' + user + '\x1f' + date + '\x1f' + text
+
+    if 'Status ID' in df.columns:
+        status_id = df['Status ID'].astype(object).fillna('').astype(str)
+        has_id = status_id.str.fullmatch(r'\d+')
+        keys = keys.where(~has_id, 'twitter:' + status_id)
+    return np.fromiter((_key_hash(key) for key in keys), dtype=np.uint64, count=len(keys))
+
+
+def filter_unseen(df, index):
+    """
+    Membuang post yang sudah ada di index, juga duplikat di dalam `df`
+    (kemunculan pertama dipertahankan).
+
+    Parameters:
+    - df (pd.DataFrame): Data hasil scraping.
+    - index (np.ndarray): Index dari `load_seen_index`.
+
+    Returns:
+    - tuple: (DataFrame post baru, hash post baru).
+    """
+    keys = post_keys(df)
+    first = ~pd.Series(keys).duplicated().to_numpy()
+    position = np.searchsorted(index, keys)
+    seen = (position < len(index)) & (index[np.minimum(position, len(index) - 1)] == keys) if len(index) else np.zeros(len(keys), dtype=bool)
+    new_rows = first & ~seen
+    logger.info(f"{int(new_rows.sum())} of {len(df)} posts not seen before")
+    return df[new_rows], keys[new_rows]
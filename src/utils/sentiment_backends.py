@@ -0,0 +1,208 @@
+import os
+import time
+import logging
+from functools import lru_cache
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from utils.sentiment_cache import model_fingerprint
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def _artifact_dir(model_path, suffix):
+    """
+    Direktori artefak backend di samping checkpoint, misalnya
+    `models/indobert_xxx-int8`. Disimpan di luar direktori model agar
+    fingerprint model (dan cache label) tidak berubah.
+    """
+    return f"{os.path.abspath(model_path).rstrip(os.sep)}-{suffix}"
+
+
+def _is_fresh(artifact_dir, fingerprint):
+    """Cek apakah artefak dibangun dari checkpoint dengan fingerprint yang sama."""
+    fingerprint_file = os.path.join(artifact_dir, "fingerprint.txt")
+    if not os.path.exists(fingerprint_file):
+        return False
+    with open(fingerprint_file) as f:
+        return f.read().strip() == fingerprint
+
+
+def _write_fingerprint(artifact_dir, fingerprint):
+    with open(os.path.join(artifact_dir, "fingerprint.txt"), "w") as f:
+        f.write(fingerprint)
+
+
+def build_int8_model(model_path):
+    """
+    Membuat (atau memuat dari cache) model hasil dynamic int8 quantization
+    pada seluruh layer Linear.
+
+    Parameters:
+    - model_path (str): Path ke checkpoint fp32.
+
+    Returns:
+    - torch.nn.Module: Model terkuantisasi dalam mode eval.
+    """
+    artifact_dir = _artifact_dir(model_path, "int8")
+    artifact_path = os.path.join(artifact_dir, "model_int8.pt")
+    fingerprint = model_fingerprint(model_path)
+
+    if _is_fresh(artifact_dir, fingerprint) and os.path.exists(artifact_path):
+        logger.info(f"Loading cached int8 model from {artifact_path}")
+        model = torch.load(artifact_path, weights_only=False)
+    else:
+        logger.info(f"Quantizing {model_path} to int8...")
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        os.makedirs(artifact_dir, exist_ok=True)
+        torch.save(model, artifact_path)
+        _write_fingerprint(artifact_dir, fingerprint)
+    model.eval()
+    return model
+
+
+def export_onnx_model(model_path):
+    """
+    Mengekspor checkpoint ke graph ONNX (atau memakai hasil ekspor sebelumnya).
+
+    Parameters:
+    - model_path (str): Path ke checkpoint fp32.
+
+    Returns:
+    - str: Path file `model.onnx`.
+    """
+    artifact_dir = _artifact_dir(model_path, "onnx")
+    onnx_path = os.path.join(artifact_dir, "model.onnx")
+    fingerprint = model_fingerprint(model_path)
+
+    if _is_fresh(artifact_dir, fingerprint) and os.path.exists(onnx_path):
+        return onnx_path
+
+    logger.info(f"Exporting {model_path} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    model.config.return_dict = False
+
+    sample = tokenizer(["contoh teks"], return_tensors="pt")
+    os.makedirs(artifact_dir, exist_ok=True)
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        onnx_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"}
+        },
+        opset_version=17,
+        dynamo=False
+    )
+    _write_fingerprint(artifact_dir, fingerprint)
+    return onnx_path
+
+
+class OnnxBackend:
+    """Runner ONNX Runtime CPU dengan antarmuka yang sama seperti model torch."""
+
+    def __init__(self, onnx_path, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("Backend 'onnx' membutuhkan paket onnxruntime: pip install onnxruntime onnx")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, input_ids, attention_mask=None):
+        logits = self.session.run(["logits"], {
+            "input_ids": input_ids.cpu().numpy(),
+            "attention_mask": attention_mask.cpu().numpy()
+        })[0]
+        return torch.from_numpy(logits)
+
+
+@lru_cache(maxsize=4)
+def load_backend(model_path, backend="torch"):
+    """
+    Memuat tokenizer dan runner inferensi untuk backend tertentu.
+
+    Backend yang tersedia:
+    - 'torch': model fp32 PyTorch (GPU jika tersedia).
+    - 'int8': dynamic int8 quantization PyTorch, CPU.
+    - 'onnx': graph ONNX yang dijalankan ONNX Runtime, CPU.
+
+    Parameters:
+    - model_path (str): Path ke model lokal.
+    - backend (str): Nama backend.
+
+    Returns:
+    - tuple: (tokenizer, runner, device). Runner dipanggil seperti model
+      torch: `runner(input_ids, attention_mask=...)`.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Choose one of {BACKENDS}.")
+
+    if backend == "torch":
+        from utils.sentiment_labeller import load_model
+        return load_model(model_path)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    device = torch.device("cpu")
+    if backend == "int8":
+        return tokenizer, build_int8_model(model_path), device
+    return tokenizer, OnnxBackend(export_onnx_model(model_path)), device
+
+
+def check_backend_parity(texts, model_path, backend, max_tokens=4096, max_batch_size=64):
+    """
+    Membandingkan label dan latensi backend terhadap model fp32.
+
+    Parameters:
+    - texts (list[str]): Teks sampel untuk dibandingkan.
+    - model_path (str): Path ke model lokal.
+    - backend (str): Backend yang diuji ('int8' atau 'onnx').
+    - max_tokens (int): Batas jumlah token (setelah padding) per batch.
+    - max_batch_size (int): Batas jumlah teks per batch.
+
+    Returns:
+    - dict: Jumlah baris, jumlah dan rasio label yang berbeda, waktu inferensi
+      masing-masing backend, dan speedup relatif terhadap fp32.
+    """
+    from utils.sentiment_labeller import predict_sentiment
+
+    timings = {}
+    labels = {}
+    for name in ("torch", backend):
+        tokenizer, runner, device = load_backend(model_path, name)
+        start = time.perf_counter()
+        labels[name] = predict_sentiment(
+            texts, tokenizer, runner, device, max_tokens, max_batch_size, show_progress=False
+        )
+        timings[name] = time.perf_counter() - start
+
+    disagreements = sum(a != b for a, b in zip(labels["torch"], labels[backend]))
+    report = {
+        'backend': backend,
+        'rows': len(texts),
+        'disagreements': disagreements,
+        'disagreement_rate': disagreements / len(texts) if texts else 0.0,
+        'fp32_seconds': timings["torch"],
+        'backend_seconds': timings[backend],
+        'speedup': timings["torch"] / timings[backend] if timings[backend] else 0.0
+    }
+    logger.info(
+        f"Backend '{backend}' parity: {disagreements}/{len(texts)} labels differ "
+        f"({report['disagreement_rate']:.2%}), speedup {report['speedup']:.2f}x"
+    )
+    return report
@@ -0,0 +1,217 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Batas jumlah parameter per query agar aman untuk SQLite
+_QUERY_CHUNK = 500
+
+
+def normalize_text(text):
+    """Normalisasi teks sebelum di-hash: trim dan satukan whitespace."""
+    return re.sub(r'\s+', ' ', str(text)).strip()
+
+
+def text_hash(text):
+    """Hash SHA-1 dari teks yang sudah dinormalisasi."""
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def model_fingerprint(model_path):
+    """
+    Membuat fingerprint direktori model dari isi config dan metadata file bobot.
+
+    Parameters:
+    - model_path (str): Path ke model lokal.
+
+    Returns:
+    - str: Fingerprint heksadesimal; berubah bila model dilatih ulang atau diganti.
+    """
+    digest = hashlib.sha1()
+    for root, _, files in os.walk(model_path):
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            rel_path = os.path.relpath(file_path, model_path)
+            digest.update(f"{rel_path}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+            if name == 'config.json':
+                with open(file_path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+class SentimentCache:
+    """
+    Cache label sentimen di SQLite, dikunci oleh hash teks serta fingerprint
+    model dan backend inferensi, sehingga label int8/onnx tidak tertukar
+    dengan label fp32.
+
+    Entri yang paling lama tidak dipakai dihapus ketika jumlah entri melebihi
+    `max_entries`.
+    """
+
+    def __init__(self, path, model_path, max_entries=1_000_000, backend="torch"):
+        self.path = path
+        self.model_fp = f"{model_fingerprint(model_path)}:{backend}"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_cache (
+                text_hash TEXT NOT NULL,
+                model_fp TEXT NOT NULL,
+                label TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (text_hash, model_fp)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used
+            ON sentiment_cache (last_used)
+        """)
+        self.conn.commit()
+
+    def get_many(self, hashes):
+        """
+        Mengambil label untuk daftar hash teks.
+
+        Parameters:
+        - hashes (list[str]): Hash teks unik.
+
+        Returns:
+        - dict: Mapping hash -> label untuk hash yang ditemukan.
+        """
+        found = {}
+        now = time.time()
+        for i in range(0, len(hashes), _QUERY_CHUNK):
+            chunk = hashes[i:i + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT text_hash, label FROM sentiment_cache "
+                f"WHERE model_fp = ? AND text_hash IN ({placeholders})",
+                [self.model_fp, *chunk]
+            ).fetchall()
+            found.update(rows)
+            self.conn.executemany(
+                "UPDATE sentiment_cache SET last_used = ? WHERE text_hash = ? AND model_fp = ?",
+                [(now, h, self.model_fp) for h, _ in rows]
+            )
+        self.conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, items):
+        """
+        Menyimpan pasangan (hash, label) lalu menjalankan eviction bila perlu.
+
+        Parameters:
+        - items (dict): Mapping hash -> label.
+        """
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO sentiment_cache (text_hash, model_fp, label, last_used) VALUES (?, ?, ?, ?)",
+            [(h, self.model_fp, label, now) for h, label in items.items()]
+        )
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Menghapus entri paling lama tidak dipakai sampai jumlahnya <= max_entries."""
+        count = self.conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute("""
+                DELETE FROM sentiment_cache
+                WHERE (text_hash, model_fp) IN (
+                    SELECT text_hash, model_fp FROM sentiment_cache
+                    ORDER BY last_used LIMIT ?
+                )
+            """, (excess,))
+            self.conn.commit()
+            logger.info(f"Evicted {excess} entries from sentiment cache.")
+
+    def stats(self):
+        """Statistik hit/miss sejak cache dibuka."""
+        entries = self.conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries
+        }
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def cached_predict(texts, model_path, cache_path, predict_fn, max_entries=1_000_000, backend="torch",
+                   embedding_store_path=None):
+    """
+    Melabeli teks dengan memakai cache; hanya teks yang belum ada di cache
+    yang dikirim ke `predict_fn`. Jika `embedding_store_path` diisi, teks yang
+    labelnya sudah ada di cache tetapi embedding-nya belum tersimpan juga
+    dikirim ke `predict_fn`, agar seluruh riwayat bisa di-rescore.
+
+    Parameters:
+    - texts (list[str]): Teks yang akan dilabeli.
+    - model_path (str): Path model, dipakai untuk fingerprint.
+    - cache_path (str): Path file SQLite cache.
+    - predict_fn (callable): Fungsi list[str] -> list[str] untuk cache miss.
+    - max_entries (int): Batas jumlah entri cache.
+    - backend (str): Backend inferensi `predict_fn`; bagian dari kunci cache.
+    - embedding_store_path (str, optional): Direktori `EmbeddingStore` yang
+      diisi oleh `predict_fn`.
+
+    Returns:
+    - list[str]: Label sentimen dengan urutan sama seperti `texts`.
+    """
+    hashes = [text_hash(text) for text in texts]
+
+    with SentimentCache(cache_path, model_path, max_entries, backend=backend) as cache:
+        unique_hashes = list(dict.fromkeys(hashes))
+        labels = cache.get_many(unique_hashes)
+
+        # Label yang ada di cache tetapi embedding-nya belum tersimpan
+        without_embedding = set()
+        if embedding_store_path and labels:
+            from utils.embedding_store import EmbeddingStore
+            with EmbeddingStore(embedding_store_path) as store:
+                stored = store.lookup(list(labels))
+            without_embedding = {h for h in labels if h not in stored}
+            if without_embedding:
+                logger.info(f"Re-encoding {len(without_embedding)} cached texts without a stored embedding.")
+
+        # Teks unik yang belum ada di cache atau belum punya embedding
+        miss_texts = {}
+        for h, text in zip(hashes, texts):
+            if (h not in labels or h in without_embedding) and h not in miss_texts:
+                miss_texts[h] = text
+
+        if miss_texts:
+            new_labels = dict(zip(miss_texts.keys(), predict_fn(list(miss_texts.values()))))
+            cache.put_many(new_labels)
+            labels.update(new_labels)
+
+        stats = cache.stats()
+        logger.info(
+            f"Sentiment cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries."
+        )
+
+    return [labels[h] for h in hashes]
@@ -0,0 +1,132 @@
+import re
+import logging
+
+from utils.sentiment_labels import LABEL_MAPPING
+
+
+logger = logging.getLogger(__name__)
+
+# Kata/emoji yang jelas bermuatan sentimen dalam diskusi pendidikan
+POSITIVE_TERMS = [
+    'bagus', 'baik', 'hebat', 'keren', 'mantap', 'mantul', 'bangga', 'senang', 'bahagia',
+    'sukses', 'berhasil', 'juara', 'prestasi', 'terbaik', 'luar biasa', 'apresiasi',
+    'terima kasih', 'makasih', 'semangat', 'inspiratif', 'bermanfaat', 'berkualitas',
+    'maju', 'unggul', 'membanggakan', 'selamat', 'setuju', 'mendukung', 'optimis',
+]
+NEGATIVE_TERMS = [
+    'buruk', 'jelek', 'parah', 'kecewa', 'sedih', 'marah', 'kesal', 'gagal', 'rusak',
+    'korupsi', 'pungli', 'bobrok', 'miris', 'memprihatinkan', 'payah', 'bodoh', 'benci',
+    'mahal', 'susah', 'sulit', 'menyedihkan', 'ketinggalan', 'tertinggal', 'malu',
+    'anjlok', 'ribet', 'mundur', 'pesimis', 'tidak adil', 'kacau',
+]
+POSITIVE_EMOJI = ['😊', '😁', '😄', '😍', '🥰', '👍', '👏', '🙏', '💪', '🎉', '❤️', '🔥', '✨']
+NEGATIVE_EMOJI = ['😡', '😠', '😤', '😢', '😭', '😞', '😔', '🙄', '👎', '💔', '🤬', '😩']
+# Kata negasi yang membalik makna kata sesudahnya ('tidak bagus', 'gak ribet')
+NEGATORS = [
+    'tidak', 'tak', 'tdk', 'gak', 'ga', 'gk', 'nggak', 'ngga', 'enggak', 'engga',
+    'bukan', 'kurang', 'belum',
+]
+# Kata penguat yang boleh ada di antara negasi dan kata sentimen ('tidak terlalu bagus')
+INTENSIFIERS = ['terlalu', 'begitu', 'cukup', 'sangat', 'amat', 'lagi', 'juga']
+
+
+def _compile_pattern(terms, emoji):
+    words = '|'.join(re.escape(term) for term in terms)
+    symbols = '|'.join(re.escape(symbol) for symbol in emoji)
+    return rf'(?:\b(?:{words})\b|{symbols})'
+
+
+def _compile_negated_pattern(terms):
+    negators = '|'.join(re.escape(word) for word in NEGATORS)
+    intensifiers = '|'.join(re.escape(word) for word in INTENSIFIERS)
+    words = '|'.join(re.escape(term) for term in terms)
+    return rf'\b(?:{negators})\s+(?:(?:{intensifiers})\s+)?(?:{words})\b'
+
+
+POSITIVE_PATTERN = _compile_pattern(POSITIVE_TERMS, POSITIVE_EMOJI)
+NEGATIVE_PATTERN = _compile_pattern(NEGATIVE_TERMS, NEGATIVE_EMOJI)
+NEGATED_POSITIVE_PATTERN = _compile_negated_pattern(POSITIVE_TERMS)
+NEGATED_NEGATIVE_PATTERN = _compile_negated_pattern(NEGATIVE_TERMS)
+NEGATOR_PATTERN = rf"\b(?:{'|'.join(re.escape(word) for word in NEGATORS)})\b"
+
+
+def lexicon_sentiment(texts):
+    """
+    Menghitung label dan tingkat keyakinan sentimen berbasis leksikon secara
+    vektor untuk seluruh Series teks.
+
+    Kata sentimen yang didahului kata negasi dihitung untuk kelas lawannya
+    ('tidak bagus' negatif, 'tidak ribet' positif). Keyakinan dihitung sebagai
+    probabilitas kelas dominan dengan Laplace smoothing:
+    max(pos + 1, neg + 1) / (pos + neg + 2). Teks tanpa kata bermuatan
+    sentimen memiliki keyakinan 0.5.
+
+    Parameters:
+    - texts (pd.Series): Teks yang akan dinilai.
+
+    Returns:
+    - tuple: (labels, confidence) berupa pd.Series sejajar dengan `texts`.
+    """
+    lowered = texts.fillna('').astype(str).str.lower()
+    negated_positive = lowered.str.count(NEGATED_POSITIVE_PATTERN)
+    negated_negative = lowered.str.count(NEGATED_NEGATIVE_PATTERN)
+    positive = lowered.str.count(POSITIVE_PATTERN) - negated_positive + negated_negative
+    negative = lowered.str.count(NEGATIVE_PATTERN) - negated_negative + negated_positive
+
+    confidence = ((positive.where(positive > negative, negative) + 1) / (positive + negative + 2))
+    labels = positive.gt(negative).map({True: LABEL_MAPPING[0], False: LABEL_MAPPING[2]})
+    labels = labels.where(positive != negative, LABEL_MAPPING[1])
+    return labels, confidence
+
+
+def label_sentiment_cascade(df, model_path, text_column="Text", threshold=0.8, label_fn=None, **kwargs):
+    """
+    Melabeli sentimen secara bertingkat: baris dengan keyakinan leksikon
+    >= `threshold` langsung diberi label leksikon, sisanya diproses IndoBERT.
+    Baris yang mengandung kata negasi selalu diproses IndoBERT, karena
+    leksikon hanya menangani negasi tepat di depan kata sentimen.
+
+    Parameters:
+    - df (pd.DataFrame): DataFrame yang memiliki kolom teks.
+    - model_path (str): Path ke model lokal.
+    - text_column (str): Nama kolom yang berisi teks untuk diproses.
+    - threshold (float): Batas keyakinan leksikon (0.5 - 1.0). Nilai lebih
+      tinggi berarti lebih banyak baris diteruskan ke transformer.
+    - label_fn (callable, optional): Fungsi pelabelan untuk sisa baris, misalnya
+      `label_sentiment_via_worker`; default `label_sentiment`.
+    - **kwargs: Argumen tambahan untuk `label_fn`.
+
+    Returns:
+    - pd.DataFrame: DataFrame dengan kolom 'Sentiment'. Statistik cascade
+      disimpan di `df.attrs['sentiment_cascade']`.
+    """
+    if text_column not in df.columns:
+        raise ValueError(f"Column '{text_column}' not found in DataFrame")
+    if label_fn is None:
+        from utils.sentiment_labeller import label_sentiment
+        label_fn = label_sentiment
+
+    labels, confidence = lexicon_sentiment(df[text_column])
+    negated = df[text_column].fillna('').astype(str).str.lower().str.contains(NEGATOR_PATTERN)
+    confident = (confidence >= threshold) & (labels != LABEL_MAPPING[1]) & ~negated
+
+    df["Sentiment"] = labels.where(confident)
+    uncertain = df.loc[~confident, [text_column]].copy()
+    if len(uncertain):
+        uncertain = label_fn(uncertain, model_path, text_column, **kwargs)
+        df.loc[~confident, "Sentiment"] = uncertain["Sentiment"]
+
+    skipped = int(confident.sum())
+    stats = {
+        'rows': len(df),
+        'lexicon_rows': skipped,
+        'transformer_rows': len(df) - skipped,
+        'skip_rate': skipped / len(df) if len(df) else 0.0,
+        'threshold': threshold
+    }
+    df.attrs['sentiment_cascade'] = stats
+    logger.info(
+        f"Sentiment cascade: {skipped}/{len(df)} rows ({stats['skip_rate']:.1%}) "
+        f"labelled by lexicon at threshold {threshold}, {stats['transformer_rows']} sent to IndoBERT."
+    )
+    return df
@@ -1,63 +1,311 @@
+import os
+import multiprocessing
+from functools import lru_cache
+
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from tqdm import tqdm
+from utils.sentiment_cache import cached_predict, text_hash
+from utils.sentiment_backends import load_backend
+from utils.sentiment_labels import LABEL_MAPPING
+
+MAX_LENGTH = 128
+
+# Model yang diwarisi proses shard lewat fork (lihat `predict_sentiment_parallel`)
+_SHARED_MODEL = None
 
-def label_sentiment(df, model_path, text_column="Text", batch_size=1):
+
+@lru_cache(maxsize=2)
+def load_model(model_path):
     """
-    Melabeli sentimen dari kolom teks pada DataFrame menggunakan model BERT.
+    Memuat tokenizer dan model BERT dari direktori lokal.
+
+    Hasil di-cache per proses sehingga pemanggilan berulang dengan path yang
+    sama tidak memuat ulang bobot model.
 
     Parameters:
-    - df (pd.DataFrame): DataFrame yang memiliki kolom teks.
     - model_path (str): Path ke model lokal.
-    - text_column (str): Nama kolom yang berisi teks untuk diproses.
-    - batch_size (int): Jumlah sampel yang diproses dalam satu batch.
 
     Returns:
-    - pd.DataFrame: DataFrame dengan kolom tambahan 'sentiment' berisi label prediksi.
+    - tuple: (tokenizer, model, device) dengan model sudah dalam mode eval.
     """
-    # Load model dan tokenizer
     tokenizer = AutoTokenizer.from_pretrained(model_path)
     model = AutoModelForSequenceClassification.from_pretrained(model_path)
 
     # Pilih perangkat (GPU jika tersedia, jika tidak gunakan CPU)
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     model = model.to(device)
+    model.eval()
+    return tokenizer, model, device
+
+
+def build_length_batches(lengths, max_tokens=4096, max_batch_size=64):
+    """
+    Mengelompokkan indeks teks ke dalam batch berdasarkan anggaran token.
+
+    Teks diurutkan berdasarkan panjang token sehingga setiap batch hanya
+    di-padding ke anggota terpanjangnya. Biaya batch dihitung sebagai
+    panjang terpanjang x jumlah anggota (ukuran tensor setelah padding).
+
+    Parameters:
+    - lengths (list[int]): Panjang token tiap teks.
+    - max_tokens (int): Batas jumlah token (setelah padding) per batch.
+    - max_batch_size (int): Batas jumlah teks per batch.
+
+    Returns:
+    - list[list[int]]: Daftar batch berisi indeks posisi asli teks.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current = []
+    for idx in order:
+        # Karena terurut naik, teks saat ini adalah yang terpanjang di batch
+        padded_tokens = lengths[idx] * (len(current) + 1)
+        if current and (padded_tokens > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def predict_sentiment(texts, tokenizer, model, device, max_tokens=4096, max_batch_size=64, show_progress=True,
+                      on_embeddings=None):
+    """
+    Memprediksi label sentimen untuk daftar teks dengan batch dinamis.
+
+    Parameters:
+    - texts (list[str]): Teks yang akan dilabeli.
+    - tokenizer: Tokenizer dari `load_model`.
+    - model: Model dari `load_model` atau runner dari `load_backend`.
+    - device (torch.device): Perangkat inferensi.
+    - max_tokens (int): Batas jumlah token (setelah padding) per batch.
+    - max_batch_size (int): Batas jumlah teks per batch.
+    - show_progress (bool): Tampilkan progress bar tqdm.
+    - on_embeddings (callable, optional): Dipanggil per batch dengan
+      (indeks posisi, np.ndarray embedding pooled CLS). Membutuhkan model
+      torch dengan head `classifier`.
+
+    Returns:
+    - list[str]: Label sentimen dengan urutan sama seperti `texts`.
+    """
+    # Tangkap input head klasifikasi (pooled CLS) lewat forward pre-hook
+    captured = []
+    hook = None
+    if on_embeddings is not None:
+        classifier = getattr(model, "classifier", None)
+        if not isinstance(classifier, torch.nn.Module):
+            raise ValueError("Embedding capture requires a torch model with a 'classifier' head")
+        hook = classifier.register_forward_pre_hook(lambda module, inputs: captured.append(inputs[0].detach()))
+
+    # Tokenisasi sekali tanpa padding untuk mengetahui panjang tiap teks
+    encodings = tokenizer(texts, max_length=MAX_LENGTH, truncation=True, padding=False)
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+    batches = build_length_batches(lengths, max_tokens, max_batch_size)
+
+    predictions = [None] * len(texts)
+    try:
+        for batch_indices in tqdm(batches, desc="Processing batches", disable=not show_progress):
+            features = [
+                {
+                    "input_ids": encodings["input_ids"][i],
+                    "attention_mask": encodings["attention_mask"][i],
+                }
+                for i in batch_indices
+            ]
+            encoded_batch = tokenizer.pad(features, padding=True, return_tensors="pt")
+
+            # Pindahkan data ke perangkat
+            input_ids = encoded_batch["input_ids"].to(device)
+            attention_mask = encoded_batch["attention_mask"].to(device)
+
+            # Inferensi model
+            with torch.no_grad():
+                outputs = model(input_ids, attention_mask=attention_mask)
+                logits = outputs.logits if hasattr(outputs, "logits") else outputs
+
+            # Kembalikan prediksi ke posisi baris aslinya
+            batch_predictions = torch.argmax(logits, dim=1).cpu().tolist()
+            for idx, label in zip(batch_indices, batch_predictions):
+                predictions[idx] = LABEL_MAPPING[label]
+
+            if on_embeddings is not None:
+                on_embeddings(batch_indices, captured.pop().float().cpu().numpy())
+    finally:
+        if hook is not None:
+            hook.remove()
+
+    return predictions
+
+
+def _init_shard_worker(num_threads):
+    """Batasi jumlah thread torch di setiap proses shard."""
+    torch.set_num_threads(num_threads)
+
+
+def _predict_shard(args):
+    texts, max_tokens, max_batch_size = args
+    tokenizer, model, device = _SHARED_MODEL
+    return predict_sentiment(texts, tokenizer, model, device, max_tokens, max_batch_size, show_progress=False)
+
+
+def predict_sentiment_parallel(texts, model_path, num_workers, threads_per_worker=None,
+                               max_tokens=4096, max_batch_size=64, backend="torch"):
+    """
+    Memprediksi label sentimen dengan membagi teks ke beberapa proses CPU.
+
+    Model dimuat sekali di proses induk, dipindahkan ke shared memory, lalu
+    diwarisi proses shard lewat fork sehingga bobot tidak disalin per proses.
+    Teks dibagi secara berselang (baris ke-i ke shard i % num_workers) agar
+    distribusi panjang tiap shard seimbang, dan hasilnya dikembalikan ke
+    urutan semula secara deterministik.
 
+    Parameters:
+    - texts (list[str]): Teks yang akan dilabeli.
+    - model_path (str): Path ke model lokal.
+    - num_workers (int): Jumlah proses shard.
+    - threads_per_worker (int, optional): Thread torch per proses; default
+      jumlah core dibagi `num_workers`.
+    - max_tokens (int): Batas jumlah token (setelah padding) per batch.
+    - max_batch_size (int): Batas jumlah teks per batch.
+    - backend (str): Backend inferensi ('torch' atau 'int8'); backend 'onnx'
+      sudah multi-thread sendiri sehingga dijalankan di satu proses.
+
+    Returns:
+    - list[str]: Label sentimen dengan urutan sama seperti `texts`.
+    """
+    global _SHARED_MODEL
+
+    tokenizer, model, device = load_backend(model_path, backend)
+    if backend == "onnx" or device.type != "cpu" or num_workers <= 1 or len(texts) < num_workers:
+        return predict_sentiment(texts, tokenizer, model, device, max_tokens, max_batch_size)
+
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+
+    # Hindari deadlock tokenizer Rust setelah fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    if backend == "torch":
+        model.share_memory()
+    _SHARED_MODEL = (tokenizer, model, device)
+
+    shards = [list(range(w, len(texts), num_workers)) for w in range(num_workers)]
+    tasks = [([texts[i] for i in shard], max_tokens, max_batch_size) for shard in shards]
+
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(num_workers, initializer=_init_shard_worker, initargs=(threads_per_worker,)) as pool:
+        results = pool.map(_predict_shard, tasks)
+
+    predictions = [None] * len(texts)
+    for shard, labels in zip(shards, results):
+        for idx, label in zip(shard, labels):
+            predictions[idx] = label
+    return predictions
+
+
+def label_sentiment(df, model_path, text_column="Text", batch_size=64, max_tokens=4096, cache_path=None,
+                    num_workers=1, threads_per_worker=None, backend="torch", embedding_store_path=None):
+    """
+    Melabeli sentimen dari kolom teks pada DataFrame menggunakan model BERT.
+
+    Teks dikelompokkan berdasarkan panjang token dan dibatch menurut anggaran
+    token, lalu hasil prediksi dikembalikan ke urutan baris semula.
+
+    Parameters:
+    - df (pd.DataFrame): DataFrame yang memiliki kolom teks.
+    - model_path (str): Path ke model lokal.
+    - text_column (str): Nama kolom yang berisi teks untuk diproses.
+    - batch_size (int): Jumlah maksimum sampel yang diproses dalam satu batch.
+    - max_tokens (int): Jumlah maksimum token (setelah padding) dalam satu batch.
+    - cache_path (str, optional): Path file SQLite cache label. Jika diisi,
+      hanya teks yang belum pernah dilabeli yang diproses model.
+    - num_workers (int): Jumlah proses CPU untuk inferensi paralel.
+    - threads_per_worker (int, optional): Thread torch per proses paralel.
+    - backend (str): Backend inferensi: 'torch' (fp32), 'int8' (dynamic
+      quantization) atau 'onnx' (ONNX Runtime). Lihat `utils.sentiment_backends`.
+    - embedding_store_path (str, optional): Direktori `EmbeddingStore`. Jika
+      diisi, embedding pooled CLS setiap teks disimpan, termasuk teks yang
+      labelnya sudah ada di cache, agar head klasifikasi baru bisa diterapkan
+      tanpa menjalankan encoder lagi (lihat `utils.embedding_store.rescore_history`). Penangkapan embedding
+      berjalan di satu proses dan tidak didukung backend 'onnx'.
+
+    Returns:
+    - pd.DataFrame: DataFrame dengan kolom tambahan 'Sentiment' berisi label prediksi.
+    """
     # Validasi kolom teks
     if text_column not in df.columns:
         raise ValueError(f"Column '{text_column}' not found in DataFrame")
 
-    # Proses data dalam batch
-    texts = df[text_column].tolist()
-    predictions = []
-
-    for i in tqdm(range(0, len(texts), batch_size), desc="Processing batches"):
-        batch_texts = texts[i:i + batch_size]
-
-        # Tokenisasi batch
-        encoded_batch = tokenizer(
-            batch_texts,
-            max_length=128,
-            padding=True,
-            truncation=True,
-            return_tensors="pt"
+    def predict(texts):
+        if embedding_store_path:
+            return predict_with_embeddings(texts)
+
+        if num_workers > 1:
+            return predict_sentiment_parallel(
+                texts, model_path, num_workers, threads_per_worker,
+                max_tokens=max_tokens,
+                max_batch_size=batch_size,
+                backend=backend
+            )
+
+        # Load model dan tokenizer hanya jika ada teks yang perlu diinferensi
+        tokenizer, model, device = load_backend(model_path, backend)
+        return predict_sentiment(
+            texts, tokenizer, model, device,
+            max_tokens=max_tokens,
+            max_batch_size=batch_size
         )
 
-        # Pindahkan data ke perangkat
-        input_ids = encoded_batch["input_ids"].to(device)
-        attention_mask = encoded_batch["attention_mask"].to(device)
+    def predict_with_embeddings(texts):
+        from utils.embedding_store import EmbeddingStore
+
+        tokenizer, model, device = load_backend(model_path, backend)
+        hashes = [text_hash(text) for text in texts]
+        with EmbeddingStore(embedding_store_path) as store:
+            def store_batch(batch_indices, embeddings):
+                store.add([hashes[i] for i in batch_indices], embeddings)
 
-        # Inferensi model
-        with torch.no_grad():
-            outputs = model(input_ids, attention_mask=attention_mask)
-            logits = outputs.logits
+            return predict_sentiment(
+                texts, tokenizer, model, device,
+                max_tokens=max_tokens,
+                max_batch_size=batch_size,
+                on_embeddings=store_batch
+            )
 
-        # Ambil label prediksi
-        batch_predictions = torch.argmax(logits, dim=1).cpu().tolist()
-        custom_mapping = {0: 'Positive', 1: 'Neutral', 2: 'Negatif'}
-        mapped_predictions = [custom_mapping[label] for label in batch_predictions]
-        predictions.extend(mapped_predictions)
+    texts = df[text_column].tolist()
+    if not texts:
+        predictions = []
+    elif cache_path:
+        predictions = cached_predict(
+            texts, model_path, cache_path, predict,
+            backend=backend, embedding_store_path=embedding_store_path
+        )
+    else:
+        predictions = predict(texts)
 
-    # Tambahkan kolom 'sentiment' ke DataFrame
+    # Tambahkan kolom 'Sentiment' ke DataFrame
     df["Sentiment"] = predictions
     return df
+
+
+def label_sentiment_stream(chunks, model_path, text_column="Text", **kwargs):
+    """
+    Melabeli sentimen secara streaming dari iterator chunk DataFrame, misalnya
+    hasil `pd.read_csv(path, chunksize=...)`.
+
+    Hanya satu chunk yang dipegang di memori pada satu waktu, sedangkan model
+    dimuat sekali dan dipakai ulang untuk seluruh chunk.
+
+    Parameters:
+    - chunks (Iterable[pd.DataFrame]): Iterator chunk yang memiliki kolom teks.
+    - model_path (str): Path ke model lokal.
+    - text_column (str): Nama kolom yang berisi teks untuk diproses.
+    - **kwargs: Argumen tambahan untuk `label_sentiment` (batch_size,
+      max_tokens, cache_path, num_workers, backend, ...).
+
+    Yields:
+    - pd.DataFrame: Chunk dengan kolom tambahan 'Sentiment'.
+    """
+    for chunk in chunks:
+        yield label_sentiment(chunk, model_path, text_column, **kwargs)
@@ -0,0 +1,3 @@
+# Label kelas model IndoBERT. Dipisah dari sentiment_labeller agar modul yang
+# hanya butuh label (leksikon, worker client) tidak mengimpor torch.
+LABEL_MAPPING = {0: 'Positive', 1: 'Neutral', 2: 'Negatif'}
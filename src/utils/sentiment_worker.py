@@ -0,0 +1,279 @@
+import os
+import socket
+import struct
+import logging
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Connection, answer_challenge, deliver_challenge
+import numpy as np
+from dotenv import load_dotenv
+
+# torch/transformers hanya diimpor saat model benar-benar dimuat, sehingga
+# klien worker tidak menanggung biaya import tersebut
+from utils.sentiment_cache import cached_predict, text_hash
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WORKER_ADDRESS = (
+    os.getenv('SENTIMENT_WORKER_HOST', '127.0.0.1'),
+    int(os.getenv('SENTIMENT_WORKER_PORT', '6010'))
+)
+# Wajib diisi nilai rahasia: multiprocessing.connection meng-unpickle setiap
+# permintaan, sehingga siapa pun yang mengetahui kunci dapat menjalankan kode di worker
+WORKER_AUTHKEY = os.getenv('SENTIMENT_WORKER_AUTHKEY', '').encode() or None
+# Batas waktu koneksi + autentikasi, dan batas waktu menunggu balasan satu permintaan
+CONNECT_TIMEOUT = float(os.getenv('SENTIMENT_WORKER_CONNECT_TIMEOUT', '5'))
+REQUEST_TIMEOUT = float(os.getenv('SENTIMENT_WORKER_TIMEOUT', '600'))
+
+
+def _ordered_embeddings(batches, count):
+    """Menyusun embedding per batch (indeks posisi, matriks) ke urutan teks semula."""
+    if not batches:
+        return np.zeros((count, 0), dtype=np.float16)
+    matrix = np.empty((count, batches[0][1].shape[1]), dtype=np.float16)
+    for indices, embeddings in batches:
+        matrix[indices] = embeddings
+    return matrix
+
+
+def _handle_connection(conn, tokenizer, model, device, model_path, backend):
+    """Melayani permintaan dari satu klien; True jika klien meminta worker berhenti."""
+    from utils.sentiment_labeller import predict_sentiment
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return False
+
+        cmd = request.get('cmd')
+        if cmd == 'label':
+            captured = [] if request.get('embeddings') else None
+            try:
+                labels = predict_sentiment(
+                    request['texts'], tokenizer, model, device,
+                    max_tokens=request.get('max_tokens', 4096),
+                    max_batch_size=request.get('batch_size', 64),
+                    on_embeddings=None if captured is None else lambda indices, batch: captured.append((indices, batch))
+                )
+            except Exception as e:
+                logger.error(f"Error labelling batch: {e}")
+                conn.send({'error': str(e)})
+            else:
+                reply = {'labels': labels}
+                if captured is not None:
+                    reply['embeddings'] = _ordered_embeddings(captured, len(labels))
+                conn.send(reply)
+        elif cmd == 'ping':
+            conn.send({'model_path': model_path, 'backend': backend})
+        elif cmd == 'shutdown':
+            conn.send({'status': 'ok'})
+            return True
+        else:
+            conn.send({'error': f"Unknown command: {cmd}"})
+
+
+def serve(model_path, backend="torch", address=WORKER_ADDRESS, authkey=WORKER_AUTHKEY):
+    """
+    Menjalankan worker inferensi sentimen yang memuat model sekali lalu
+    melayani permintaan batch melalui socket lokal.
+
+    Setiap permintaan berupa dict dengan kunci 'cmd':
+    - 'label': {'texts': [...], 'batch_size': int, 'max_tokens': int} -> {'labels': [...]};
+      dengan 'embeddings': True, balasan juga berisi 'embeddings' (matriks float16
+      embedding pooled CLS, sejajar dengan 'texts')
+    - 'ping': -> {'model_path': str, 'backend': str}
+    - 'shutdown': menghentikan worker.
+
+    Koneksi yang gagal autentikasi atau terputus di tengah jalan (misalnya
+    klien yang kehabisan waktu menunggu) hanya dicatat dan ditutup; worker
+    tetap melayani klien berikutnya.
+
+    Parameters:
+    - model_path (str): Path ke model lokal.
+    - backend (str): Backend inferensi ('torch', 'int8' atau 'onnx').
+    - address (tuple): Alamat (host, port) yang didengarkan worker.
+    - authkey (bytes): Kunci autentikasi koneksi.
+
+    Raises:
+    - ValueError: Jika SENTIMENT_WORKER_AUTHKEY (atau `authkey`) tidak di-set.
+    """
+    if not authkey:
+        raise ValueError("Refusing to start without an authkey; set SENTIMENT_WORKER_AUTHKEY to a secret value.")
+
+    from utils.sentiment_backends import load_backend
+
+    model_path = os.path.abspath(model_path)
+    logger.info(f"Loading sentiment model from {model_path} ({backend} backend)...")
+    tokenizer, model, device = load_backend(model_path, backend)
+
+    with Listener(address, authkey=authkey) as listener:
+        logger.info(f"Sentiment worker listening on {address[0]}:{address[1]}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                logger.warning(f"Rejected sentiment worker connection: {e!r}")
+                continue
+            with conn:
+                try:
+                    if _handle_connection(conn, tokenizer, model, device, model_path, backend):
+                        logger.info("Sentiment worker shutting down.")
+                        return
+                except (OSError, EOFError) as e:
+                    logger.warning(f"Dropped sentiment worker connection: {e!r}")
+
+
+class SentimentWorkerClient:
+    """Client untuk worker inferensi sentimen yang sedang berjalan."""
+
+    def __init__(self, address=WORKER_ADDRESS, authkey=WORKER_AUTHKEY,
+                 connect_timeout=CONNECT_TIMEOUT, timeout=REQUEST_TIMEOUT):
+        if not authkey:
+            raise ValueError("SENTIMENT_WORKER_AUTHKEY is not set")
+        self.timeout = timeout
+        self.conn = self._connect(address, authkey, connect_timeout)
+
+    @staticmethod
+    def _connect(address, authkey, connect_timeout):
+        # Sama seperti multiprocessing.connection.Client, tetapi koneksi dan
+        # handshake dibatasi waktu: worker yang sedang melayani klien lain
+        # belum memanggil accept() dan akan membuat handshake menunggu selamanya
+        sock = socket.create_connection(address, timeout=connect_timeout)
+        sock.settimeout(None)
+        seconds = int(connect_timeout)
+        timeval = struct.pack('ll', seconds, int((connect_timeout - seconds) * 1e6))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, timeval)
+        family = sock.family
+        conn = Connection(sock.detach())
+        try:
+            answer_challenge(conn, authkey)
+            deliver_challenge(conn, authkey)
+            # Batas waktu permintaan ditangani oleh poll() di _request
+            with socket.fromfd(conn.fileno(), family, socket.SOCK_STREAM) as handle:
+                handle.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, struct.pack('ll', 0, 0))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _request(self, payload):
+        self.conn.send(payload)
+        if not self.conn.poll(self.timeout):
+            raise TimeoutError(f"Sentiment worker did not reply within {self.timeout}s")
+        response = self.conn.recv()
+        if 'error' in response:
+            raise RuntimeError(f"Sentiment worker error: {response['error']}")
+        return response
+
+    def info(self):
+        """Path model dan backend yang dimuat oleh worker."""
+        return self._request({'cmd': 'ping'})
+
+    def label(self, texts, batch_size=64, max_tokens=4096):
+        """Mengirim daftar teks ke worker dan mengembalikan label sentimen."""
+        return self._request({
+            'cmd': 'label',
+            'texts': list(texts),
+            'batch_size': batch_size,
+            'max_tokens': max_tokens
+        })['labels']
+
+    def label_with_embeddings(self, texts, batch_size=64, max_tokens=4096):
+        """Seperti `label`, tetapi juga mengembalikan embedding pooled CLS setiap teks."""
+        response = self._request({
+            'cmd': 'label',
+            'texts': list(texts),
+            'batch_size': batch_size,
+            'max_tokens': max_tokens,
+            'embeddings': True
+        })
+        return response['labels'], response['embeddings']
+
+    def shutdown(self):
+        """Meminta worker berhenti."""
+        self._request({'cmd': 'shutdown'})
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def label_sentiment_via_worker(df, model_path, text_column="Text", batch_size=64, max_tokens=4096,
+                               cache_path=None, num_workers=1, backend="torch", embedding_store_path=None,
+                               address=WORKER_ADDRESS, authkey=WORKER_AUTHKEY):
+    """
+    Melabeli sentimen melalui worker yang sedang berjalan, dengan fallback ke
+    inferensi di dalam proses jika worker tidak tersedia, tidak membalas dalam
+    batas waktu, mengembalikan error, atau memuat model/backend lain.
+
+    Parameters:
+    - df (pd.DataFrame): DataFrame yang memiliki kolom teks.
+    - model_path (str): Path ke model lokal.
+    - text_column (str): Nama kolom yang berisi teks untuk diproses.
+    - batch_size (int): Jumlah maksimum sampel dalam satu batch.
+    - max_tokens (int): Jumlah maksimum token (setelah padding) dalam satu batch.
+    - cache_path (str, optional): Path file SQLite cache label.
+    - num_workers (int): Jumlah proses CPU untuk fallback inferensi di dalam proses.
+    - backend (str): Backend inferensi yang diharapkan.
+    - embedding_store_path (str, optional): Direktori `EmbeddingStore`; embedding
+      setiap teks yang diinferensi (oleh worker maupun fallback) disimpan di sini.
+    - address (tuple): Alamat (host, port) worker.
+    - authkey (bytes): Kunci autentikasi koneksi.
+
+    Returns:
+    - pd.DataFrame: DataFrame dengan kolom tambahan 'Sentiment' berisi label prediksi.
+    """
+    if text_column not in df.columns:
+        raise ValueError(f"Column '{text_column}' not found in DataFrame")
+
+    if not authkey:
+        logger.info("SENTIMENT_WORKER_AUTHKEY is not set. Labelling in-process.")
+    else:
+        try:
+            with SentimentWorkerClient(address, authkey) as client:
+                info = client.info()
+                if os.path.realpath(info['model_path']) != os.path.realpath(model_path) or info['backend'] != backend:
+                    logger.warning(
+                        f"Sentiment worker serves {info['model_path']} ({info['backend']}), "
+                        f"not {model_path} ({backend}). Labelling in-process."
+                    )
+                else:
+                    logger.info(f"Labelling {len(df)} rows via sentiment worker at {address[0]}:{address[1]}")
+                    texts = df[text_column].tolist()
+
+                    def predict(batch):
+                        if not embedding_store_path:
+                            return client.label(batch, batch_size, max_tokens)
+                        from utils.embedding_store import EmbeddingStore
+                        labels, embeddings = client.label_with_embeddings(batch, batch_size, max_tokens)
+                        with EmbeddingStore(embedding_store_path) as store:
+                            store.add([text_hash(text) for text in batch], embeddings)
+                        return labels
+
+                    if cache_path:
+                        df["Sentiment"] = cached_predict(
+                            texts, model_path, cache_path, predict,
+                            backend=backend, embedding_store_path=embedding_store_path
+                        )
+                    else:
+                        df["Sentiment"] = predict(texts)
+                    return df
+        except (OSError, EOFError, RuntimeError) as e:
+            # OSError mencakup TimeoutError; RuntimeError adalah balasan {'error': ...} dari worker
+            logger.warning(f"Sentiment worker unavailable ({e}). Labelling in-process.")
+
+    from utils.sentiment_labeller import label_sentiment
+    return label_sentiment(
+        df, model_path, text_column, batch_size, max_tokens, cache_path,
+        num_workers=num_workers,
+        backend=backend,
+        embedding_store_path=embedding_store_path
+    )
@@ -0,0 +1,118 @@
+import os
+import json
+import logging
+
+import pandas as pd
+
+from utils.artifact_store import ARTIFACT_ROOT
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_PATH = os.path.join(ARTIFACT_ROOT, "_state", "transform_watermarks.json")
+
+
+def load_watermarks(path=WATERMARK_PATH):
+    """
+    Membaca high-water mark per platform.
+
+    Parameters:
+    - path (str): Path file JSON watermark.
+
+    Returns:
+    - dict: Mapping platform -> watermark; kosong jika file belum ada.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(watermarks, path=WATERMARK_PATH):
+    """
+    Menyimpan watermark secara atomik (tulis file sementara lalu rename),
+    sehingga run yang gagal di tengah tidak meninggalkan file rusak.
+
+    Parameters:
+    - watermarks (dict): Mapping platform -> watermark.
+    - path (str): Path file JSON watermark.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def _status_ids(df):
+    # Nullable Int64 agar ID 19 digit tidak kehilangan presisi lewat float
+    ids = df['Status ID'].astype(object)
+    ids = ids.where(ids.astype(str).str.fullmatch(r'\d+'), None)
+    return pd.to_numeric(ids, errors='coerce', dtype_backend='numpy_nullable').astype('Int64')
+
+
+def _post_times(df):
+    # Tanggal posting, atau waktu scraping jika tanggal tidak ada
+    date = pd.to_datetime(df['Date'], utc=True, errors='coerce', format='mixed')
+    scraped_at = pd.to_datetime(df['Scraped At'], utc=True, errors='coerce', format='mixed')
+    return date.fillna(scraped_at)
+
+
+def filter_new_rows(df, platform, watermark=None):
+    """
+    Memilih baris yang melewati watermark platform.
+
+    Twitter memakai 'Status ID' (ID tweet naik seiring waktu); baris tanpa
+    Status ID yang valid selalu diproses. Threads memakai 'Date', dengan
+    'Scraped At' sebagai cadangan jika tanggal kosong.
+
+    Parameters:
+    - df (pd.DataFrame): Data hasil scraping satu platform.
+    - platform (str): 'twitter' atau 'threads'.
+    - watermark (dict, optional): Watermark sebelumnya; None berarti semua baris baru.
+
+    Returns:
+    - tuple: (DataFrame baris baru, watermark baru).
+    """
+    watermark = watermark or {}
+    if platform.lower() == 'twitter':
+        keys = _status_ids(df)
+        last_key = watermark.get('status_id')
+    else:
+        keys = _post_times(df)
+        last_key = pd.Timestamp(watermark['time']) if watermark.get('time') else None
+
+    if last_key is None:
+        new_rows = pd.Series(True, index=df.index)
+    else:
+        new_rows = (keys > last_key).fillna(False) | keys.isna()
+    candidates = [key for key in (keys[new_rows].max(), last_key) if pd.notna(key)]
+    high = max(candidates) if candidates else None
+
+    if platform.lower() == 'twitter':
+        new_mark = {'status_id': int(high) if high is not None else None}
+    else:
+        new_mark = {'time': high.isoformat() if high is not None else None}
+
+    logger.info(f"{platform}: {int(new_rows.sum())} of {len(df)} rows past watermark {watermark or None}")
+    return df[new_rows], new_mark
+
+
+def max_watermark(platform, first, second):
+    """
+    Watermark tertinggi dari dua watermark platform yang sama (None diabaikan).
+
+    Parameters:
+    - platform (str): 'twitter' atau 'threads'.
+    - first (dict, optional): Watermark pertama.
+    - second (dict, optional): Watermark kedua.
+
+    Returns:
+    - dict: Watermark yang lebih tinggi.
+    """
+    key = 'status_id' if platform.lower() == 'twitter' else 'time'
+    values = [mark for mark in (first, second) if mark and mark.get(key) is not None]
+    if not values:
+        return first or second
+    if key == 'time':
+        return max(values, key=lambda mark: pd.Timestamp(mark['time']))
+    return max(values, key=lambda mark: mark['status_id'])